@@ -1,235 +1,159 @@
+import collections
+import threading
 
-import pandas as pd
-pd.set_option('display.max_colwidth', None)
+from recipe_core import SearchWorker, ThumbnailCache, VirtualGrid, get_cookbook, get_pantry, image_cache, timed
 
-import json
-import os
-from PIL import Image, ImageQt
 
 
+cookbook = get_cookbook()  # the shared data layer, see recipe_core
+pantry = get_pantry()
+thumbnails = ThumbnailCache()  # resized tile images kept on disk between sessions
 
-class Recipe:
-    """Represents a recipe with title, ingredients, instructions, and image name"""
 
-    def __init__(self, title, ingredients, instructions, image_name):
-        """Initializes a new Recipe object
-
-        Parameters:
-            title (str): The title of the recipe
-            ingredients (str): A list of ingredients, separated by commas
-            instructions (str): A list of instructions, separated by line breaks
-            image_name (str): The name of the image associated with the recipe
-        """
-        self.title = str(title)  # stores the title of the recipe
-        self.ingredients = str(ingredients)  # stores the ingredients as a string
-        self.instructions = str(instructions)  # stores the instructions as a string
-        self.image_name = str(image_name)  # stores the name of the image associated with the recipe
 
 
 
-class Pantry:
-    def __init__(self):
-        self.recipes = []
-        self.previous_recipe = {i: "" for i in range(1, 11)}
-        self.load_saved_recipes()
-        self.previous_recipe_placeholder = 1
-
-    def add_recipe(self, recipe):
-        """Add a new recipe to the collection"""
-        self.recipes.append(recipe)  # add the recipe to the list of recipes
-        print(recipe.title)
-
-    def get_recipe(self, title):
-        """Find a recipe by title and return it, or None if not found"""
-        for recipe in self.recipes:  # iterate over the recipes
-            if recipe.title == title:  # check if the title matches
-                return recipe  # return the matching recipe
-        return None  # if no match is found, return None
-
-    def remove_recipe(self, title):
-        """Remove a recipe by title and return True if successful, or False if not found"""
-        for i, recipe in enumerate(self.recipes):  # iterate over the recipes with indices
-            if recipe.title == title:  # check if the title matches
-                del self.recipes[i]  # delete the matching recipe
-                return True  # return True if the recipe was removed
-        return False  # if no match is found, return False
-
-
-    def to_dict(self):
-        """Converts the recipe list to a dictionary"""
-        recipe_dict = {}  # initialize an empty dictionary
-        for recipe in self.recipes:  # iterate over the recipes
-            recipe_info = {  # create a dictionary to store the recipe info
-                'title': recipe.title,  # add the title
-                'ingredients': recipe.ingredients,  # add the ingredients
-                'instructions': recipe.instructions,  # add the instructions
-                'image_name': recipe.image_name  # add the image name
-            }
-            recipe_dict[recipe.title] = recipe_info  # add the recipe info to the main dictionary
-        return recipe_dict  # return the completed dictionary
-
-
-    def write_recipe_dict_to_json(self):
-        """Writes the recipe dictionary to a JSON file"""
-        filepath = r"archive\Sample.json"  # path to the JSON file
-
-        with open(filepath, 'w') as f:  # open the file in write mode
-            json.dump(self.to_dict(), f, indent=4)  # write the updated temp dictionary to the file, with indentation
-
-
-    def load_saved_recipes(self):
-        filepath = r"archive\Sample.json"  # path to the JSON file
+#########################################Gui Below This##################################################
 
-        # Open the file in read mode
-        with open(filepath, 'r') as f:
-            # Load the JSON data into a dictionary
-            recipe_dict = json.load(f)
 
-        # Clear the existing recipes list
-        self.recipes = []
 
-        # Iterate over the recipes in the dictionary
-        for title, recipe_info in recipe_dict.items():
-            # Create a new Recipe object from the dictionary values
-            recipe = Recipe(title, recipe_info['ingredients'], recipe_info['instructions'], recipe_info['image_name'])
 
-            # Add the new recipe to the list
-            self.recipes.append(recipe)
 
 
-    def remove_recipe_from_json(self, title):
-        """Removes a recipe from a JSON file"""
-        filepath = r"archive\Sample.json"  # path to the JSON file
-        with open(filepath, 'r') as f:  # open the file in read mode
-            recipe_dict = json.load(f)  # load the JSON data into a dictionary
+import sys
+from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QFileDialog, QLabel, QMessageBox, QListWidget,QTextEdit
+from PyQt5.QtCore import QDir
+from PyQt5.QtGui import QImage, QPixmap
+import glob
+from PyQt5.QtWidgets import QGridLayout
+from PyQt5.QtWidgets import QVBoxLayout
+from PyQt5.QtCore import Qt, QThread, QTimer, QStringListModel
+from PyQt5.QtWidgets import QFrame
+from PyQt5.QtWidgets import QScrollArea
+from PyQt5.QtWidgets import QCompleter
+from PyQt5.QtWidgets import QApplication, QWidget
 
-        if title in recipe_dict:  # check if the title is in the dictionary
-            del recipe_dict[title]  # remove the recipe with the given title
+from functools import partial
+import re
+from PyQt5 import QtWidgets
 
-        with open(filepath, 'w') as f:  # open the file in write mode
-            json.dump(recipe_dict, f, indent=4)  # write the updated dictionary to the file, with indentation
+from PyQt5.QtGui import QColor, QPalette
 
 
+class RecipeTile(QWidget):
+    """One cell of the recipe grid, a recipe's image with its button under it. Tiles are reused as the grid scrolls."""
 
-    def add_previous_recipe(self, input_value):
+    def __init__(self, parent, open_recipe):
         """
-        Increments all key values in pevious_recipe_dictionary by one.
-        Then assigns the input value to the first slot in the previous_recipe dictionary,
+        Parameters:
+            parent (QWidget): The widget the grid is drawn on
+            open_recipe (function): Called with the tile's recipe when its button is clicked
         """
+        super().__init__(parent)
+        self.recipe = None  # the recipe the tile is showing
 
-        for key in reversed(range(1, 11)):
-            temp_dict = self.previous_recipe.copy()
-            if key > 1:
-                temp_dict[key] = self.previous_recipe[key - 1]  # shift values down
-            self.previous_recipe = temp_dict
-
-        self.previous_recipe[1] = input_value  # assign the input value to the "wrapped around" slot
-
-        return
-
-
-    def __len__(self):
-        return len(self.recipes)
-
-    def __getitem__(self, index):
-        return self.recipes[index]
-
-
-
-
-
-
-class Cookbook:
-    def __init__(self, dataframe=None):  # initialize the class with an optional dataframe parameter
-        csv_loc = r"archive\Food Ingredients and Recipe Dataset with Image Name Mapping.csv"  # path to the CSV file
-        self.dataframe = pd.read_csv(csv_loc, index_col=False)  # read the CSV file into a Pandas dataframe
-
-    def print_database(self):  # print the entire dataframe
-        print(self.dataframe)
-
-    def get_random_recipe(self):
-        """Fetch a random recipe from the dataframe"""
-        random_row = self.dataframe.sample(1)  # sample a single row from the dataframe
-        random_row = random_row.replace('\n', ' ', regex=True)  # replace newlines with spaces
-        title = random_row['Title'].to_string(index=False)  # extract the title
-        ingredients = random_row['Ingredients'].to_string(index=False)  # extract the ingredients
-        instructions = random_row['Instructions'].to_string(index=False)  # extract the instructions
-        image_name = random_row['Image_Name'].to_string(index=False)  # extract the image name
-        recipe = Recipe(title, ingredients, instructions, image_name)  # create a Recipe object
-        return recipe
+        layout = QVBoxLayout(self)
 
-    def search_recipes(self, search_term):
-        """Search for recipe titles containing the given term using regex"""
-        pattern = r"(?i)" + re.escape(search_term)  # ignore case and escape special chars
-        matches = self.dataframe['Title'].str.contains(pattern, na=False)  # find matches in the Title column
-        return list(self.dataframe['Title'][matches].values)  # return a list of matching titles
+        # Add the image to the vertical layout
+        self.label = QLabel(self)
+        layout.addWidget(self.label, alignment=Qt.AlignCenter)
 
-    def fetch_specific_recipe(self, title):
-        """Fetch a specific recipe by title using exact regex match"""
-        pattern = r"\b" + re.escape(title) + r"\b"  # word boundary escaping
-        match = self.dataframe['Title'].str.match(pattern, na=False)  # find an exact match in the Title column
-        if match.any():  # if there's at least one match
-            row = self.dataframe[match].iloc[0]  # return the first match
-
-            row = row.replace('\n', ' ', regex=True)  # replace newlines with spaces
-            title = row['Title']  # extract the title
-            ingredients = row['Ingredients'] # extract the ingredients
-            instructions = row['Instructions']  # extract the instructions
-            image_name = row['Image_Name'] # extract the image name
-            recipe = Recipe(title, ingredients, instructions, image_name)  # create a Recipe object
-            return recipe
-        else:  # if no match is found
-            return None
-
-    def get_random_recipes(self, num_recipes):
-        """Get specified number of random recipes"""
-
-        recipes = []
-        for i in range(num_recipes):
-            recipe = self.get_random_recipe()
-            recipes.append(recipe)
-
-        return recipes
-
-
-    #'Grilled Shrimp with Tamarind Sauce'
-
-
-
-cookbook = Cookbook()
-pantry = Pantry()
-
-
-
-
-
-#########################################Gui Below This##################################################
+        # Add the button to the vertical layout
+        self.button = QPushButton(self)
+        self.button.clicked.connect(lambda: open_recipe(self.recipe))
+        layout.addWidget(self.button, alignment=Qt.AlignCenter)
 
 
+class PagePrefetcher(QThread):
+    """
+    Decodes the tile images of whole pages on a worker thread, so turning to them is instant.
 
+    The window passes the pages it wants ready, current page first, every time the page
+    changes. The worker gets the thumbnails through the shared image cache and turns them
+    into QImages, which unlike QPixmaps may be made off the GUI thread. The last max_pages pages decoded are
+    kept, least recently used first, and a page turn drops the page being decoded if it
+    is no longer wanted.
+    """
 
+    def __init__(self, tile_size, max_pages=4, parent=None):
+        """
+        Parameters:
+            tile_size (tuple): Box the tile images are shrunk to fit
+            max_pages (int): How many decoded pages to keep
+            parent (QObject): The window that owns the thread
+        """
+        super().__init__(parent)
+        self.tile_size = tile_size
+        self.max_pages = max_pages
 
+        self.pages = collections.OrderedDict()  # page key -> {image_name: QImage}, least recently used first
+        self.wanted = []  # (page key, image names) still to decode, in order
+        self.stopping = False
+        self.condition = threading.Condition()  # guards everything above and wakes the worker
 
-import sys
-from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QFileDialog, QLabel, QMessageBox, QListWidget,QTextEdit
-from PyQt5.QtCore import QDir
-from PyQt5.QtGui import QPixmap
-import glob
-from PyQt5.QtWidgets import QGridLayout
-from PyQt5.QtWidgets import QVBoxLayout
-from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QFrame
-from PyQt5.QtWidgets import QScrollArea
-from PyQt5.QtWidgets import QApplication, QWidget
+    @staticmethod
+    def page_key(recipes):
+        """Returns the key a page of recipes is kept under, the same for any list holding the same images"""
+        return tuple(recipe.image_name for recipe in recipes)
 
-from functools import partial
-import re
-from PyQt5 import QtWidgets
+    def prefetch(self, pages):
+        """
+        Replaces the pages to decode
 
-from PyQt5.QtGui import QColor, QPalette
+        Parameters:
+            pages (list): Lists of recipes, one per page, most wanted first
+        """
+        with self.condition:
+            self.wanted = [(self.page_key(recipes), [recipe.image_name for recipe in recipes if cookbook.image_exists(recipe.image_name)])
+                           for recipes in pages if recipes]
+            self.condition.notify()
+
+    def image(self, key, image_name):
+        """Returns the decoded QImage of image_name on the page with the given key, or None if it isn't ready"""
+        with self.condition:
+            page = self.pages.get(key)
+            if page is None:
+                return None
+            self.pages.move_to_end(key)
+            return page.get(image_name)
+
+    def stop(self):
+        """Stops the worker and waits for it to finish the image it is on"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.wanted and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                key, image_names = self.wanted.pop(0)
+                if key in self.pages:
+                    continue  # already decoded
+                wanted = self.wanted
+
+            images = {}
+            for image_name in image_names:
+                if self.stopping or self.wanted is not wanted:
+                    break  # the page was turned, start on the new list
+                image = image_cache.get(image_name, self.tile_size, True, thumbnails.get)
+                if image is not None:
+                    images[image_name] = qimage_from_image(image)
+            else:
+                with self.condition:
+                    self.pages[key] = images
+                    while len(self.pages) > self.max_pages:
+                        self.pages.popitem(last=False)
 
 
 class MainWindow(QtWidgets.QWidget):
+    tile_size = (274, 274)  # box the tile images are shrunk to fit, the width of the dataset's images
+    cell_size = (390, 340)  # size of one grid cell, the image with the recipe button under it
+
     def __init__(self):
         super().__init__()
 
@@ -238,6 +162,24 @@ class MainWindow(QtWidgets.QWidget):
         self.recipes_per_page = 99
 
         self.recipe_list = cookbook.get_random_recipes(1000)
+        self.showing_saved = False  # True while recipe_list holds the saved recipes
+        self.grid = None  # VirtualGrid of the current page, only holding tiles for the rows in view
+        self.grid_area = None  # widget the tiles of the current page are drawn on
+        self.page_recipes = []  # the recipes of the current page
+
+        pantry.subscribe(self.on_pantry_changed)
+
+        # Decodes the current, next and previous pages in the background
+        self.prefetcher = PagePrefetcher(self.tile_size, parent=self)
+        self.prefetcher.start()
+        self.page_key = None  # prefetcher key of the current page
+
+        # Searches run on a worker thread, and their results are collected by a timer on the GUI thread.
+        # Title matches come first, then recipes whose ingredients or instructions hold every word
+        self.search_worker = SearchWorker(cookbook.search_passes)  # the title matches show before the full-text pass runs
+        self.search_job = None
+        self.search_timer = QTimer(self)
+        self.search_timer.timeout.connect(self.add_search_results)
 
         self.initUI()
 
@@ -271,6 +213,18 @@ class MainWindow(QtWidgets.QWidget):
             self.entry_box = QtWidgets.QLineEdit(self)
             self.entry_box.move(300, 70)
 
+            # Suggests titles as the user types, once they pause for a moment
+            self.suggestions = QStringListModel(self)
+            self.completer = QCompleter(self.suggestions, self)
+            self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)  # the titles are already the matches
+            self.completer.activated.connect(self.print_new)
+            self.entry_box.setCompleter(self.completer)
+            self.suggestion_timer = QTimer(self)
+            self.suggestion_timer.setSingleShot(True)
+            self.suggestion_timer.setInterval(50)  # completing a title takes well under a millisecond, so the wait can be short
+            self.suggestion_timer.timeout.connect(self.show_suggestions)
+            self.entry_box.textEdited.connect(lambda text: self.suggestion_timer.start())  # restarting drops the wait for the text before
+
             self.new_button = QtWidgets.QPushButton('New', self)
             self.new_button.move(400, 70)
             self.new_button.clicked.connect(self.print_new)
@@ -283,6 +237,7 @@ class MainWindow(QtWidgets.QWidget):
             self.scroll_area = QtWidgets.QScrollArea(self)
             self.scroll_area.setGeometry(0, 100, 300, 150)
             self.scroll_area.setWidgetResizable(True)
+            self.scroll_area.verticalScrollBar().valueChanged.connect(self.update_visible_tiles)
 
             self.frame = QtWidgets.QFrame()
             self.frame.setLayout(QtWidgets.QVBoxLayout())
@@ -321,6 +276,8 @@ class MainWindow(QtWidgets.QWidget):
 
 
     def option_changed(self, index):
+        self.cancel_search()
+        self.showing_saved = index == 0
         if index == 0:
             try:
                 self.load_saved_recipes()
@@ -337,129 +294,183 @@ class MainWindow(QtWidgets.QWidget):
     def print_new(self):
         try:
             self.current_page = 0
-            results = cookbook.search_recipes(self.entry_box.text())
-            recipe_objects = []
-            for recipe_name in results:
-                recipe_objects.append(cookbook.fetch_specific_recipe(recipe_name))
-
-            self.recipe_list = recipe_objects
-
+            self.showing_saved = False
+            self.recipe_list = []
             self.clean_frame()
-            print(self.recipe_list)
-            self.print_hello()
+            self.suggestion_timer.stop()  # suggestions still waiting would pop up over the results
+
+            # The search runs in the background, cancelling any search still running, and add_search_results shows it
+            self.search_job = self.search_worker.submit(self.entry_box.text())
+            self.search_timer.start(15)
 
         except Exception as e:
             print(e)
 
+    def show_suggestions(self):
+        """Fills the entry box's completer with the titles to suggest for what has been typed"""
+        self.suggestions.setStringList(cookbook.suggest_titles(self.entry_box.text()))
+        if self.suggestions.rowCount():
+            self.completer.complete()
+
+    def add_search_results(self):
+        """Adds the batches of search results that have arrived, called by search_timer until the search is done"""
+        job = self.search_job
+        if job is None:
+            self.search_timer.stop()
+            return
+
+        added = False
+        for positions in job.ready():
+            self.recipe_list.extend(cookbook.recipes_at(positions))
+            added = True
+
+        if job.done():
+            self.search_timer.stop()
+            self.search_job = None
+            if not self.recipe_list:
+                # Show the recipes with the closest titles instead, in case the title was mistyped
+                self.recipe_list = cookbook.fetch_many(cookbook.closest_titles(job.query))
+                print("No recipe found for", repr(job.query) + (", showing the closest titles" if self.recipe_list else ""))
+                added = bool(self.recipe_list)
+
+        if added:
+            if self.grid is None:
+                self.print_hello()  # the best matches arrive first, so the first page shows straight away
+            elif len(self.page_recipes) < self.recipes_per_page:
+                self.refresh_grid()  # the current page is still filling up
+            else:
+                self.prefetch_pages()  # only the pages after this one changed
+
+    def cancel_search(self):
+        """Stops the search still running, if there is one"""
+        self.search_worker.cancel()
+        self.search_job = None
+        self.search_timer.stop()
+
 
+    @timed
     def print_hello(self):
 
         try:
             self.clean_frame()
-            #directory = QFileDialog.getExistingDirectory(self, "Select Directory")
-            if True == True:
-                images, buttons = self.create_recipe_buttons_with_image_paths()
-
-                if images is None:
+            page_start = self.current_page*self.recipes_per_page
+            if not self.recipe_list[page_start:page_start+self.recipes_per_page]:
+                if self.current_page > 0:
                     self.current_page = 0
                     self.print_hello()
-                    return
-
-                if images:
-                    # Create a grid layout to display the images
-                    grid = QGridLayout()
-                    self.frame.layout().addLayout(grid)
-
-                    # Create a vertical layout for each image and button pair
-                    for i, (image, button) in enumerate(zip(images, buttons)):
-                        vbox = QVBoxLayout()
-
-                        # Add the image to the vertical layout
-                        label = QLabel(self)
-                        label.setPixmap(QPixmap(image))
-                        vbox.addWidget(label, alignment=Qt.AlignCenter)
-
-                        # Add the button to the vertical layout
-                        vbox.addWidget(button, alignment=Qt.AlignCenter)
-
-                        # Add the vertical layout to the grid layout
-                        grid.addLayout(vbox, i // 3, 2 * (i % 3))
-                    self.create_prev_next_buttons()
                 else:
                     print("No images found.")
-            else:
-                print("No directory selected.")
+                return
+
+            # Only the tiles in view are created, the rest of the page is made as it scrolls into view
+            self.grid_area = QWidget(self)
+            self.grid = VirtualGrid(3, self.cell_size, self.create_tile, self.bind_tile, self.hide_tile)
+            self.frame.layout().addWidget(self.grid_area, alignment=Qt.AlignHCenter)
+            self.scroll_area.verticalScrollBar().setValue(0)  # a new page starts at the top
+            self.refresh_grid()
+            self.create_prev_next_buttons()
         except Exception as e:
             print("An error occurred:", e)
 
+    @timed
+    def refresh_grid(self):
+        """Fits the grid to the recipes of the current page and fills in the tiles in view"""
+        page_start = self.current_page*self.recipes_per_page
+        self.page_recipes = self.recipe_list[page_start:page_start+self.recipes_per_page]
+        self.prefetch_pages()
+
+        self.grid.reset(len(self.page_recipes))
+        self.grid_area.setFixedSize(self.grid.columns * self.grid.cell_width, self.grid.content_height())
+        self.update_visible_tiles()
+        QTimer.singleShot(0, self.update_visible_tiles)  # again once the frame has been laid out at the new size
+
+    def prefetch_pages(self):
+        """Asks the prefetcher for the rest of the current page, then the next and previous pages"""
+        page_start = self.current_page*self.recipes_per_page
+        next_page = self.recipe_list[page_start+self.recipes_per_page:page_start+2*self.recipes_per_page]
+        previous_page = self.recipe_list[max(page_start-self.recipes_per_page, 0):page_start]
+
+        self.page_key = self.prefetcher.page_key(self.page_recipes)
+        self.prefetcher.prefetch([self.page_recipes, next_page, previous_page])
+
+    def update_visible_tiles(self, *args):
+        """Moves the tiles to the rows in view, called whenever the page scrolls or the window resizes"""
+        if self.grid is None:
+            return
+        top = self.scroll_area.verticalScrollBar().value() - self.grid_area.y()
+        self.grid.update(top, self.scroll_area.viewport().height())
+
+    @timed
+    def create_tile(self):
+        """Creates an empty tile on the grid"""
+        tile = RecipeTile(self.grid_area, self.start_recipe_generator)
+        tile.resize(*self.cell_size)
+        return tile
+
+    @timed
+    def bind_tile(self, tile, index):
+        """Moves a tile to the cell of the page recipe at index and fills it in for that recipe"""
+        recipe = self.page_recipes[index]
+        tile.recipe = recipe
+        tile.button.setText(recipe.title)
+        tile.label.setPixmap(self.tile_pixmap(recipe))
+        tile.move(*self.grid.cell_origin(index))
+        tile.show()
+
+    def hide_tile(self, tile):
+        """Hides a tile that scrolled out of view and lets go of its image"""
+        tile.hide()
+        tile.label.clear()
+        tile.recipe = None
+
+    def on_pantry_changed(self, event, recipe):
+        """
+        Keeps the saved recipes grid in step with the pantry, called by the pantry on every save and removal.
+        The page keeps its scroll position and only the tiles in view are filled in again.
+        """
+        if not self.showing_saved:
+            return
 
+        if event == 'added':
+            self.recipe_list.append(recipe)
+            if self.grid is None:
+                self.print_hello()  # nothing was shown yet, so there is no grid to add to
+                return
+
+        elif event == 'removed':
+            for i, saved in enumerate(self.recipe_list):
+                if saved.title == recipe.title:
+                    del self.recipe_list[i]
+                    break
+            else:
+                return
 
-    def create_recipe_buttons_with_image_paths(self):
-        buttons = []
-        image_paths = []
-
-        # Create a new variable to hold the filtered recipe list
-        filtered_recipes = self.recipe_list[self.current_page*self.recipes_per_page:(self.current_page+1)*self.recipes_per_page]
-
-        # Check if there are any recipes in the filtered list
-        if len(filtered_recipes) == 0:
-            return None, None
-        else:
-            try:
-                for recipe in filtered_recipes:
-                    # Create a new button for the recipe
-                    button = QPushButton(recipe.title, self)
-
-                    # Connect the button's clicked signal to a lambda function that prints the text of the button
-                    button.clicked.connect(partial(self.start_recipe_generator, recipe))
-
-                    # Append the button to the buttons list
-                    buttons.append(button)
-
-                    # Construct the image path for the recipe
-                    image_path = os.path.join("archive", "Food Images", recipe.image_name + ".jpg")
-
-                    # Append the image path to the image_paths list
-                    image_paths.append(image_path)
-
-            except Exception as e:
-                print("An error occurred: {}".format(e))
-
-        # Return both the buttons list and the image_paths list
-        return image_paths, buttons
-
-
-
+        if self.grid is not None:
+            self.refresh_grid()
 
+    def tile_pixmap(self, recipe):
+        """Returns a recipe's tile image, from the prefetched pages or the shared image cache when possible"""
+        if not cookbook.image_exists(recipe.image_name):
+            return QPixmap()  # known to be missing, so nothing is opened
 
+        image = self.prefetcher.image(self.page_key, recipe.image_name)
+        if image is not None:
+            return QPixmap.fromImage(image)  # decoded ahead of time, only uploaded here
 
+        image = image_cache.get(recipe.image_name, self.tile_size, True, thumbnails.get)
+        if image is None:
+            return QPixmap()
+        return pixmap_from_image(image)
 
     def load_saved_recipes(self):
         """
-        Loads saved recipes from a JSON file into the recipes list.
+        Loads saved recipes into the recipes list.
 
-        Opens the specified JSON file in read mode, loads the data into a dictionary,
-        and then iterates over the recipes in the dictionary. For each recipe, creates
-        a new Recipe object from the dictionary values and adds it to the recipes list.
+        Every window shares the one pantry, which is kept up to date as recipes are saved
+        and removed, so this copies its recipes without reading the JSON file.
         """
 
-        filepath = r"archive\Sample.json"  # path to the JSON file
-
-        # Open the file in read mode
-        with open(filepath, 'r') as f:
-            # Load the JSON data into a dictionary
-            recipe_dict = json.load(f)
-
-        # Clear the existing recipes list
-        self.recipe_list = []
-
-        # Iterate over the recipes in the dictionary
-        for title, recipe_info in recipe_dict.items():
-            # Create a new Recipe object from the dictionary values
-            recipe = Recipe(title, recipe_info['ingredients'], recipe_info['instructions'], recipe_info['image_name'])
-
-            # Add the new recipe to the list
-            self.recipe_list.append(recipe)
+        self.recipe_list = list(pantry.recipes)
 
 
 
@@ -470,26 +481,36 @@ class MainWindow(QtWidgets.QWidget):
         for widget in self.frame.findChildren(QWidget):
             if widget != self.scroll_area:
                 widget.deleteLater()
+
+        # Take out the stretch left by the previous page too, so the new page starts at the top of the frame
+        layout = self.frame.layout()
+        while layout.count():
+            layout.takeAt(0)
         self.frame.update()
+        self.grid = None
+        self.grid_area = None
+        self.page_recipes = []
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self.scroll_area.setGeometry(0, 100, self.width(), self.height() - 100)
+        self.update_visible_tiles()
 
+    def closeEvent(self, event):
+        self.cancel_search()
+        self.suggestion_timer.stop()
+        # The prefetch thread has to finish before the window that owns it is destroyed
+        self.prefetcher.stop()
+        super().closeEvent(event)
 
 
 
+
+    @timed
     def start_recipe_generator(self,recipe):
-        trimmed_string = recipe.ingredients[1:-1]
-        recipe_list = re.split(",(?=(?:[^'']*'[^'']*')*[^'']*$)", trimmed_string)
         try:
             self.new_window = RecipeViewer()
-            self.new_window.recipe = recipe
-            self.new_window.populateIngredients()
-            self.new_window.populateInstructions()
-            #self.new_window.printImageName()
-            self.new_window.setImage()
-            self.new_window.is_recipe_in_pantry()
+            self.new_window.showRecipe(recipe)
             self.new_window.show()
         except Exception as e:
             print(e)
@@ -500,14 +521,32 @@ class MainWindow(QtWidgets.QWidget):
 ###################### Recipe Viewer Class ###################################################################
 
 from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtWidgets import QLabel, QHBoxLayout
+from PyQt5.QtWidgets import QLabel, QHBoxLayout, QAbstractItemView
+
+
+def qimage_from_image(image):
+    """Converts an RGB PIL image to a QImage without writing it to disk. Safe to call off the GUI thread."""
+    data = image.tobytes()
+    return QImage(data, image.width, image.height, image.width * 3, QImage.Format_RGB888).copy()  # own the pixels, not data
+
+
+def pixmap_from_image(image):
+    """Converts an RGB PIL image to a QPixmap without writing it to disk"""
+    return QPixmap.fromImage(qimage_from_image(image))
+
 
 class RecipeViewer(QWidget):
+    image_size = (400, 400)  # box the recipe's image is shrunk to fit
+
     def __init__(self):
         super().__init__()
+        self.save_button = None
+        self.unsave_button = None
+        self.suggestions = []  # recipes listed in suggestion_list, in the same order
         self.initUI()
         self.recipe = None
-        self.pantry = Pantry()
+        self.pantry = pantry  # the shared pantry, so opening a viewer doesn't read the JSON file
+        self.pantry.subscribe(self.on_pantry_changed)
 
     def initUI(self):
         self.setWindowTitle("Recipe Viewer")
@@ -552,30 +591,32 @@ class RecipeViewer(QWidget):
         self.vbox.addWidget(self.textbox)
         #self.vbox.addWidget(self.save_button, stretch=1)
 
+        # Recipes found by ingredient, double click one to show it here
+        self.listbox.setSelectionMode(QAbstractItemView.ExtendedSelection)  # select the ingredients on hand
+        self.similar_button = QPushButton("Recipes Like This", self)
+        self.similar_button.clicked.connect(self.showSimilar)
+        self.can_make_button = QPushButton("Recipes With Selected Ingredients", self)
+        self.can_make_button.clicked.connect(self.showCanMake)
+        suggestion_buttons = QHBoxLayout()
+        suggestion_buttons.addWidget(self.similar_button)
+        suggestion_buttons.addWidget(self.can_make_button)
+        self.vbox.addLayout(suggestion_buttons)
+
+        self.suggestion_list = QListWidget(self)
+        self.suggestion_list.setMaximumHeight(150)
+        self.suggestion_list.itemDoubleClicked.connect(self.openSuggestion)
+        self.vbox.addWidget(self.suggestion_list)
+
         self.setLayout(self.vbox)
         self.clearAll()
 
     def saveRecipe(self):
         """
-        Save a recipe to the pantry and write the pantry's recipe dictionary to a JSON file.
-        Also updates the main gui to reflect any changes made in saved recipes.
+        Save a recipe to the pantry and record it on disk.
+        The pantry tells the main gui and every open viewer, including this one, which swaps its save button.
         """
         try:
-            self.pantry.add_recipe(self.recipe)              # Add Recipe to the pantry
-
-            self.pantry.write_recipe_dict_to_json()          # Write the pantry's recipe dictionary to a JSON file
-
-            option_text = window.option_menu.currentText()   # Get the current text of the option menu from main window
-
-            # If the current text is "Saved Recipes", Refresh the Gui. this is so the newly saved recipe is visibile.
-            if option_text == "Saved Recipes":
-                window.load_saved_recipes()    #reload recipes in main gui
-                window.print_hello()           #reload the widgets in main gui
-
-
-            self.save_button.deleteLater() # Delete the save button
-
-            self.is_recipe_in_pantry() #Changes the save button to un-save button
+            self.pantry.save_recipe(self.recipe)             # Add Recipe to the pantry and record it on disk
 
         except Exception as e:
             print(e)
@@ -590,7 +631,7 @@ class RecipeViewer(QWidget):
             bool: True if the recipe is in the pantry, False otherwise.
         """
         # Check if the recipe is already in the pantry
-        if self.recipe.title in [recipe.title for recipe in self.pantry.recipes]:
+        if self.recipe in self.pantry:
 
             # If it is, add a "Un-Save Recipe" button to the GUI
             self.unsave_button = QPushButton("Un-Save Recipe", self)
@@ -615,25 +656,78 @@ class RecipeViewer(QWidget):
 
     def remove_recipe_from_saved(self):
         """
-
+        Removes the recipe from the pantry and records it on disk.
+        The pantry tells the main gui and every open viewer, including this one, which swaps its un-save button.
         """
         try:
-            #Removes the recipe from the pantry recipe list and then from the json where the recpies are saved.
-            self.pantry.remove_recipe(self.recipe.title)
-            self.pantry.remove_recipe_from_json(self.recipe.title)
+            self.pantry.unsave_recipe(self.recipe.title)
+
+        except Exception as e:
+            print("Error removing recipe from pantry:", e)
 
-            #Update the Main gui. Reloads the recipe list and then the widgets
-            window.load_saved_recipes()
-            window.print_hello()
+    def on_pantry_changed(self, event, recipe):
+        """Swaps the Save and Un-Save buttons when this recipe is saved or removed, here or in another viewer"""
+        if self.recipe is None or recipe.title != self.recipe.title:
+            return
 
-            #Remove the un-save button
-            self.unsave_button.deleteLater()
+        self.removeSaveButtons()
+        self.is_recipe_in_pantry()
 
-            #Change to the save button
-            self.is_recipe_in_pantry()
+    def removeSaveButtons(self):
+        """Takes the Save or Un-Save button off the viewer"""
+        for button in (self.save_button, self.unsave_button):
+            if button is not None:
+                button.deleteLater()
+        self.save_button = None
+        self.unsave_button = None
 
+    def showRecipe(self, recipe):
+        """Shows a recipe in the viewer, replacing the one shown before"""
+        self.clearAll()
+        self.removeSaveButtons()
+        self.recipe = recipe
+        self.populateIngredients()
+        self.populateInstructions()
+        self.setImage()
+        self.is_recipe_in_pantry()
+
+    def showSuggestions(self, recipes, notes):
+        """Lists the given recipes under the buttons that found them, each title followed by its note"""
+        self.suggestions = recipes
+        self.suggestion_list.clear()
+        if not recipes:
+            self.suggestion_list.addItem("No recipes found.")
+        for recipe, note in zip(recipes, notes):
+            self.suggestion_list.addItem(f"{recipe.title} ({note})")
+
+    def showSimilar(self):
+        """Lists the recipes whose ingredients are most like this one's"""
+        try:
+            found = cookbook.similar_recipes(self.recipe)
+            self.showSuggestions([recipe for recipe, _ in found], [f"{score:.0%} alike" for _, score in found])
         except Exception as e:
-            print("Error removing recipe from pantry:", e)
+            print("Error finding similar recipes:", e)
+
+    def showCanMake(self):
+        """Lists the recipes that can be made with the selected ingredients, or with all of them if none are selected"""
+        selected = [item.text() for item in self.listbox.selectedItems() if self.listbox.row(item) > 0]  # not the heading
+        try:
+            found = cookbook.recipes_with_ingredients(selected or self.recipe.ingredient_list)
+            self.showSuggestions([recipe for recipe, _ in found],
+                                 [f"needs {missing} more" if missing else "nothing else needed" for _, missing in found])
+        except Exception as e:
+            print("Error finding recipes for these ingredients:", e)
+
+    def openSuggestion(self, item):
+        """Shows the suggested recipe that was double clicked, keeping the list so the others can be opened too"""
+        row = self.suggestion_list.row(item)
+        if row < len(self.suggestions):
+            self.showRecipe(self.suggestions[row])
+
+    def closeEvent(self, event):
+        """Stops listening to the pantry once the viewer is closed"""
+        self.pantry.unsubscribe(self.on_pantry_changed)
+        super().closeEvent(event)
 
     def clearAll(self):
         """
@@ -645,19 +739,24 @@ class RecipeViewer(QWidget):
 
     def populateIngredients(self):
         self.listbox.addItem("Ingredients:")
-        trimmed_string = self.recipe.ingredients[1:-1]
-        recipe_list = re.split(",(?=(?:[^'']*'[^'']*')*[^'']*$)", trimmed_string)
-        for ingredient in recipe_list:
+        for ingredient in self.recipe.ingredient_list:
             self.listbox.addItem(f"{ingredient}")
 
     def populateInstructions(self):
         self.textbox.setText('')
         self.textbox.append(self.recipe.instructions)
 
+    @timed
     def setImage(self):
-        # Construct the image path for the recipe
-        image_path = os.path.join("archive", "Food Images", self.recipe.image_name + ".jpg")
-        self.image_label.setPixmap(QPixmap(image_path))
+        if not cookbook.image_exists(self.recipe.image_name):
+            print(f"Invalid image name: {self.recipe.image_name}")
+            return
+
+        # Decode the recipe's image at no more than the size it is shown at, or reuse it if it was shown recently
+        image = image_cache.get(self.recipe.image_name, self.image_size, fit=True)
+        if image is None:
+            return
+        self.image_label.setPixmap(pixmap_from_image(image))
         self.image_label.setScaledContents(True)
         self.image_label.setFixedSize(self.image_label.sizeHint())
 
@@ -1,200 +1,13 @@
-import pandas as pd
-
-pd.set_option('display.max_colwidth', None)
-
-import json
 import os
 
+from recipe_core import (SearchWorker, ThumbnailCache, ThumbnailPipeline, VirtualGrid, get_cookbook, get_pantry, image_cache,
+                         timed)
 
-class Recipe:
-    """Represents a recipe with title, ingredients, instructions, and image name"""
-
-    def __init__(self, title, ingredients, instructions, image_name):
-        """Initializes a new Recipe object
-
-        Parameters:
-            title (str): The title of the recipe
-            ingredients (str): A list of ingredients, separated by commas
-            instructions (str): A list of instructions, separated by line breaks
-            image_name (str): The name of the image associated with the recipe
-        """
-        self.title = str(title)  # stores the title of the recipe
-        self.ingredients = str(ingredients)  # stores the ingredients as a string
-        self.instructions = str(instructions)  # stores the instructions as a string
-        self.image_name = str(image_name)  # stores the name of the image associated with the recipe
-
-
-
-class Pantry:
-    def __init__(self):
-        self.recipes = []
-        self.previous_recipe = {i: "" for i in range(1, 11)}
-        self.load_saved_recipes()
-        self.previous_recipe_placeholder = 1
-
-    def add_recipe(self, recipe):
-        """Add a new recipe to the collection"""
-        self.recipes.append(recipe)  # add the recipe to the list of recipes
-
-    def get_recipe(self, title):
-        """Find a recipe by title and return it, or None if not found"""
-        for recipe in self.recipes:  # iterate over the recipes
-            if recipe.title == title:  # check if the title matches
-                return recipe  # return the matching recipe
-        return None  # if no match is found, return None
-
-    def remove_recipe(self, title):
-        """Remove a recipe by title and return True if successful, or False if not found"""
-        for i, recipe in enumerate(self.recipes):  # iterate over the recipes with indices
-            if recipe.title == title:  # check if the title matches
-                del self.recipes[i]  # delete the matching recipe
-                return True  # return True if the recipe was removed
-        return False  # if no match is found, return False
-
-
-    def to_dict(self):
-        """Converts the recipe list to a dictionary"""
-        recipe_dict = {}  # initialize an empty dictionary
-        for recipe in self.recipes:  # iterate over the recipes
-            recipe_info = {  # create a dictionary to store the recipe info
-                'title': recipe.title,  # add the title
-                'ingredients': recipe.ingredients,  # add the ingredients
-                'instructions': recipe.instructions,  # add the instructions
-                'image_name': recipe.image_name  # add the image name
-            }
-            recipe_dict[recipe.title] = recipe_info  # add the recipe info to the main dictionary
-        return recipe_dict  # return the completed dictionary
-
-
-    def write_recipe_dict_to_json(self):
-        """Writes the recipe dictionary to a JSON file"""
-        filepath = r"archive\Sample.json"  # path to the JSON file
-
-        with open(filepath, 'w') as f:  # open the file in write mode
-            json.dump(self.to_dict(), f, indent=4)  # write the updated temp dictionary to the file, with indentation
-
-
-    def load_saved_recipes(self):
-        filepath = r"archive\Sample.json"  # path to the JSON file
-
-        # Open the file in read mode
-        with open(filepath, 'r') as f:
-            # Load the JSON data into a dictionary
-            recipe_dict = json.load(f)
-
-        # Clear the existing recipes list
-        self.recipes = []
-
-        # Iterate over the recipes in the dictionary
-        for title, recipe_info in recipe_dict.items():
-            # Create a new Recipe object from the dictionary values
-            recipe = Recipe(title, recipe_info['ingredients'], recipe_info['instructions'], recipe_info['image_name'])
-
-            # Add the new recipe to the list
-            self.recipes.append(recipe)
-
-
-    def remove_recipe_from_json(self, title):
-        """Removes a recipe from a JSON file"""
-        filepath = r"archive\Sample.json"  # path to the JSON file
-        with open(filepath, 'r') as f:  # open the file in read mode
-            recipe_dict = json.load(f)  # load the JSON data into a dictionary
-
-        if title in recipe_dict:  # check if the title is in the dictionary
-            del recipe_dict[title]  # remove the recipe with the given title
-
-        with open(filepath, 'w') as f:  # open the file in write mode
-            json.dump(recipe_dict, f, indent=4)  # write the updated dictionary to the file, with indentation
-
-
-
-    def add_previous_recipe(self, input_value):
-        """
-        Increments all key values in pevious_recipe_dictionary by one.
-        Then assigns the input value to the first slot in the previous_recipe dictionary,
-        """
-
-        for key in reversed(range(1, 11)):
-            temp_dict = self.previous_recipe.copy()
-            if key > 1:
-                temp_dict[key] = self.previous_recipe[key - 1]  # shift values down
-            self.previous_recipe = temp_dict
-
-        self.previous_recipe[1] = input_value  # assign the input value to the "wrapped around" slot
-
-        return
-
-
-    def __len__(self):
-        return len(self.recipes)
-
-    def __getitem__(self, index):
-        return self.recipes[index]
-
-
-
-
-
-
-class Cookbook:
-    def __init__(self, dataframe=None):  # initialize the class with an optional dataframe parameter
-        csv_loc = r"archive\Food Ingredients and Recipe Dataset with Image Name Mapping.csv"  # path to the CSV file
-        self.dataframe = pd.read_csv(csv_loc, index_col=False)  # read the CSV file into a Pandas dataframe
-
-    def print_database(self):  # print the entire dataframe
-        print(self.dataframe)
-
-    def get_random_recipe(self):
-        """Fetch a random recipe from the dataframe"""
-        random_row = self.dataframe.sample(1)  # sample a single row from the dataframe
-        random_row = random_row.replace('\n', ' ', regex=True)  # replace newlines with spaces
-        title = random_row['Title'].to_string(index=False)  # extract the title
-        ingredients = random_row['Ingredients'].to_string(index=False)  # extract the ingredients
-        instructions = random_row['Instructions'].to_string(index=False)  # extract the instructions
-        image_name = random_row['Image_Name'].to_string(index=False)  # extract the image name
-        recipe = Recipe(title, ingredients, instructions, image_name)  # create a Recipe object
-        return recipe
-
-    def search_recipes(self, search_term):
-        """Search for recipe titles containing the given term using regex"""
-        pattern = r"(?i)" + re.escape(search_term)  # ignore case and escape special chars
-        matches = self.dataframe['Title'].str.contains(pattern, na=False)  # find matches in the Title column
-        return list(self.dataframe['Title'][matches].values)  # return a list of matching titles
-
-    def fetch_specific_recipe(self, title):
-        """Fetch a specific recipe by title using exact regex match"""
-        pattern = r"\b" + re.escape(title) + r"\b"  # word boundary escaping
-        match = self.dataframe['Title'].str.match(pattern, na=False)  # find an exact match in the Title column
-        if match.any():  # if there's at least one match
-            row = self.dataframe[match].iloc[0]  # return the first match
-
-            row = row.replace('\n', ' ', regex=True)  # replace newlines with spaces
-            title = row['Title']  # extract the title
-            ingredients = row['Ingredients'] # extract the ingredients
-            instructions = row['Instructions']  # extract the instructions
-            image_name = row['Image_Name'] # extract the image name
-            recipe = Recipe(title, ingredients, instructions, image_name)  # create a Recipe object
-            return recipe
-        else:  # if no match is found
-            return None
-
-    def get_random_recipes(self, num_recipes):
-        """Get specified number of random recipes"""
-
-        recipes = []
-        for i in range(num_recipes):
-            recipe = self.get_random_recipe()
-            recipes.append(recipe)
-
-        return recipes
-
-
-    #'Grilled Shrimp with Tamarind Sauce'
 
-
-
-cookbook = Cookbook()
-pantry = Pantry()
+cookbook = get_cookbook()  # the shared data layer, see recipe_core
+pantry = get_pantry()
+thumbnails = ThumbnailCache()  # resized grid images kept on disk between sessions
+thumbnail_pipeline = ThumbnailPipeline(thumbnails, memory=image_cache)  # makes grid images on every core at once
 
 ###########################GUI Below This#########################################
 
@@ -235,7 +48,7 @@ class recipeGUI:
         self.label1.grid(row=1, column=0)
 
         ########### Buttons ###########
-        self.segemented_button = ctk.CTkSegmentedButton(window,border_width=20,corner_radius=10,unselected_hover_color="gray", values=["Previous Recipe","New Recipe", "Save Recipe", "Remove Recipe"],command=self.segmented_button_callback)
+        self.segemented_button = ctk.CTkSegmentedButton(window,border_width=20,corner_radius=10,unselected_hover_color="gray", values=["Previous Recipe","Next Recipe","New Recipe", "Save Recipe", "Remove Recipe"],command=self.segmented_button_callback)
         #self.segemented_button.set("Value 1")
         self.segemented_button.grid(row=4, column=0)
 
@@ -248,9 +61,10 @@ class recipeGUI:
 
 
         ######## creates the dropdown menu object ###########
-        self.optionmenu = ctk.CTkOptionMenu(window, values=[food.title for food in pantry.recipes],command=self.optionmenu_callback)
+        self.optionmenu = ctk.CTkOptionMenu(window, values=pantry.titles(),command=self.optionmenu_callback)
         self.optionmenu.set("Saved Recipes")
         self.optionmenu.grid(row = 4, column = 1)
+        pantry.subscribe(self.on_pantry_changed)  # keeps the dropdown in step with saves and removals
 
 
         ######## Combobox creation ########
@@ -259,11 +73,21 @@ class recipeGUI:
 
         self.menulist.grid(column = 0, row = 0)
 
+        # Suggests titles as the user types, once they pause for a moment
+        self.suggestion_delay = 50  # milliseconds, completing a title takes well under one
+        self.pending_suggestions = None  # after() id of the suggestions waiting to be shown
+        self.menulist.bind("<KeyRelease>", self.on_search_typed)
+
 
         ######## Search button #######
         self.search_button = ctk.CTkButton(window, text="Search", command=self.search_recipe)
         self.search_button.grid(row = 0, column = 1)
 
+        # Searches run on a worker thread, and add_search_results collects their results on the GUI thread
+        self.search_worker = SearchWorker(self.search_title_passes)
+        self.search_job = None
+        self.search_results = []
+
 
         ######## Initializes the Image #########
         self.your_image = ctk.CTkImage(light_image=Image.open(os.path.join(r"archive\first_image.jpg")), size=(500 , 500))
@@ -296,6 +120,10 @@ class recipeGUI:
             self.previous_recipe()
             self.segemented_button.set("Value 1")
 
+        elif value == "Next Recipe":
+            self.next_recipe()
+            self.segemented_button.set("Value 1")
+
         elif value == "Save Recipe":
             self.save_current_recipe()
             self.segemented_button.set("Value 1")
@@ -309,136 +137,188 @@ class recipeGUI:
 
 
     #updates image
+    @timed
     def get_image(self,image_name):
-        Image_path = r"archive\Food Images\\" + image_name + ".jpg"
-        self.your_image.configure(light_image=Image.open(os.path.join(Image_path)))
+        if not cookbook.image_exists(image_name):
+            print(f"Invalid image name: {image_name}")
+            return
+
+        # Decode the image at the size the label shows it at, or reuse it if it was shown recently
+        image = image_cache.get(image_name, self.your_image.cget("size"))
+        if image is None:
+            print(f"Invalid image name: {image_name}")
+            return
+        self.your_image.configure(light_image=image)
 
     #Updates the text box
+    @timed
     def update_text(self,food_object):
         self.textbox.configure(state="normal")
         self.textbox.delete('0.0', "end")
         if isinstance(food_object, str):  # Check if food_object is a string
             return  # If it's a string, don't try to access ingredients
         self.textbox.insert('0.0', "Instructions:" + '\n\n' + food_object.instructions)
-        self.update_listbox(food_object.ingredients)
+        self.update_listbox(food_object.ingredient_list)
         self.get_image(str(food_object.image_name))
         self.textbox.configure(state="disabled")
         self.label1.configure(text=str(food_object.title))
 
 
     #this is the button that generates a new recipe
+    @timed
     def new_recipe_button(self):
         temp = cookbook.get_random_recipe()
         self.update_text(temp)
-        pantry.add_previous_recipe(temp)
-        pantry.previous_recipe_placeholder = 2
+        pantry.history.push(temp)
 
 
-    #This is the button to return to the previous Recipe
+    #This is the button to return to the previous Recipe, going round to the newest one after the oldest
     def previous_recipe(self):
+        recipe = pantry.history.back(wrap=True)
+        if recipe is not None:
+            self.update_text(recipe)
 
 
-        if pantry.previous_recipe_placeholder < 11 and pantry.previous_recipe[pantry.previous_recipe_placeholder] != '':
-            self.update_text(pantry.previous_recipe[pantry.previous_recipe_placeholder])
-            pantry.previous_recipe_placeholder += 1
-        else:
-            self.update_text(pantry.previous_recipe[1])
-            pantry.previous_recipe_placeholder = 2
+    #This is the button to go forward again after going back
+    def next_recipe(self):
+        recipe = pantry.history.forward()
+        if recipe is not None:
+            self.update_text(recipe)
 
 
 
     #This button saves the current recipe and updates the dropdown menu
     def save_current_recipe(self):
+        recipe = pantry.history.current
 
-        pantry_recipe_titles = [item.title for item in pantry.recipes]
-
-        if pantry.previous_recipe_placeholder == 2 and pantry.previous_recipe[1].title not in pantry_recipe_titles:
+        if recipe is None:
+            print("There is no recipe to save")
 
-            pantry.add_recipe(pantry.previous_recipe[1])
-            print(f"Recipe saved: {pantry.previous_recipe[1].title}")
-            pantry.write_recipe_dict_to_json()
-
-        elif pantry.previous_recipe_placeholder == 2 and pantry.previous_recipe[1].title in pantry_recipe_titles:
-            print(f"You already have this recipe saved: {pantry.previous_recipe[1].title}")
-
-        elif pantry.previous_recipe_placeholder != 2 and pantry.previous_recipe[pantry.previous_recipe_placeholder - 1].title in pantry_recipe_titles:
-            print(f"You already have this recipe saved: {pantry.previous_recipe[pantry.previous_recipe_placeholder - 1].title}")
+        elif recipe in pantry:
+            print(f"You already have this recipe saved: {recipe.title}")
 
         else:
-            pantry.add_recipe(pantry.previous_recipe[pantry.previous_recipe_placeholder - 1])
-            print(f"Recipe saved: {pantry.previous_recipe[pantry.previous_recipe_placeholder - 1].title}")
-            pantry.write_recipe_dict_to_json()
-
-
-        self.optionmenu.configure(values=[food.title for food in pantry.recipes])
+            pantry.save_recipe(recipe)
+            print(f"Recipe saved: {recipe.title}")
 
 
 
 
     #Deletes the selected recipe.
     def delete_recipe_from_json(self):
+        if pantry.history.current is None:
+            print("There is no recipe to remove")
+            return
 
-        current_recipe = pantry.previous_recipe[pantry.previous_recipe_placeholder-1].title
+        current_recipe = pantry.history.current.title
 
 
-        if current_recipe in [recipe.title for recipe in pantry.recipes]:
-            pantry.remove_recipe(current_recipe)
-            self.optionmenu.configure(values=[food.title for food in pantry.recipes])
-            pantry.write_recipe_dict_to_json()
+        if current_recipe in pantry:
+            pantry.unsave_recipe(current_recipe)
             print(f"Recipe removed: {current_recipe}")
         else:
             print(f"Recipe has not been saved: {current_recipe}")
 
 
 
+    #Called by the pantry whenever a recipe is saved or removed
+    def on_pantry_changed(self, event, recipe):
+        self.optionmenu.configure(values=pantry.titles())
+
+
     #sets recipe to selected saved recipe
     def optionmenu_callback(self,choice):
-        for recipe in pantry.recipes:
-            if recipe.title == choice:
-                delete_me = recipe
-                self.update_text(recipe)
-                pantry.add_previous_recipe(recipe)
-                pantry.previous_recipe_placeholder = 2
+        recipe = pantry.get_recipe(choice)
+        if recipe is not None:
+            self.update_text(recipe)
+            pantry.history.push(recipe)
 
 
     def combobox_callback(self,search_term):
         # Updates the text box based on the search item clicked
         search_term = self.menulist.get()
+        self.cancel_suggestions()
         if search_term != None and search_term != "Search Recipes Here":
             recipe = cookbook.fetch_specific_recipe(search_term)
             print(recipe)
+            if recipe is None:
+                # Offer the closest title, in case the title was mistyped
+                closest = cookbook.closest_titles(search_term)
+                if closest:
+                    self.menulist.configure(values=closest)
+                    if messagebox.askyesno("No recipe found", f"No recipe found with title '{search_term}'. Did you mean '{closest[0]}'?"):
+                        self.menulist.set(closest[0])
+                        recipe = cookbook.fetch_specific_recipe(closest[0])
+                else:
+                    messagebox.showinfo("No recipe found", f"No recipe found with title '{search_term}'")
             if recipe is not None:
                 self.update_text(recipe)
-                pantry.add_previous_recipe(recipe)
-                pantry.previous_recipe_placeholder = 2
-            else:
-                messagebox.showinfo("No recipe found", f"No recipe found with title '{search_term}'")
+                pantry.history.push(recipe)
         else:
             pass
 
+    def on_search_typed(self, event):
+        #Waits for the user to pause typing before suggesting titles, dropping the suggestions for what they typed before
+        self.cancel_suggestions()
+        self.pending_suggestions = self.menulist.after(self.suggestion_delay, self.show_suggestions)
+
+    def cancel_suggestions(self):
+        #Drops the suggestions waiting to be shown, if any, so they don't replace search results
+        if self.pending_suggestions is not None:
+            self.menulist.after_cancel(self.pending_suggestions)
+            self.pending_suggestions = None
+
+    def show_suggestions(self):
+        #Puts the titles to suggest for what has been typed in the dropdown
+        self.pending_suggestions = None
+        suggestions = cookbook.suggest_titles(self.menulist.get())
+        if suggestions:
+            self.menulist.configure(values=suggestions)
+
+
+    def search_title_passes(self, search_term):
+        #Yields the matching titles a pass at a time, the title matches then the full-text ones. Runs on the search worker's thread
+        for positions in cookbook.search_passes(search_term):
+            yield [cookbook.title_index.titles[position] for position in positions]
 
     def search_recipe(self):
-        #Gets the search parameter and searches for the recipe.
+        #Gets the search parameter and starts searching for the recipe in the background, cancelling any search still running
         search_term = self.menulist.get()
-        results = cookbook.search_recipes(search_term)
-
-        #Set Menu entrys to search results
-        self.menulist.configure(values=results)
+        self.cancel_suggestions()
+        self.search_results = []
+        self.search_job = self.search_worker.submit(search_term)
+        self.add_search_results()
+
+    def add_search_results(self):
+        """Adds the batches of search results that have arrived to the menu, checking again shortly until the search is done"""
+        job = self.search_job
+        if job is None:
+            return
+
+        batches = job.ready()
+        for titles in batches:
+            self.search_results.extend(titles)
+        if batches:
+            #Set Menu entrys to search results
+            self.menulist.configure(values=self.search_results)
+
+        if not job.done():
+            self.menulist.after(15, self.add_search_results)
+            return
+        self.search_job = None
 
         # If no results, display message
-        if not results:
-            if search_term:
-                messagebox.showinfo("No recipe found", f"No recipe found with title '{search_term}'")
+        if not self.search_results:
+            if job.query:
+                messagebox.showinfo("No recipe found", f"No recipe found for '{job.query}'")
             else:
                 messagebox.showinfo("Error", "Please enter a search term")
 
-    def update_listbox(self, recipe):
+    def update_listbox(self, ingredient_list):
         if self.listbox.size() > 0:
             self.listbox.delete(0, ctk.END)
         self.listbox.insert(ctk.END, "Ingredients:")
-        trimmed_string = recipe[1:-1]
-        recipe_list = trimmed_string.split(",")
-        for item in recipe_list:
+        for item in ingredient_list:
             self.listbox.insert(ctk.END, item)
 
 import PIL.Image as Image
@@ -455,11 +335,15 @@ class ImageDisplayer:
         - __init__: Initializes the ImageDisplayer class.
         - on_mouse_wheel: Handles mouse wheel events.
         - button_clicked: Populates the GUI with images and buttons for each recipe.
+        - update_visible_tiles: Moves the tiles to the rows scrolled into view.
         - load_saved_recipes: Loads saved recipes from a JSON file.
         - check_window_size_and_call_button_clicked: Checks if the window size has changed and updates the GUI accordingly.
         - button_clicked2: Displays the chosen recipe when a button is clicked.
         - mainloop: Starts the GUI event loop.
     """
+    image_size = (400, 400)  # size the recipe images are resized to
+    cell_size = (403, 450)  # size of one tile, the image with the recipe button under it
+
     def __init__(self,recipes=None):
         """
             Initializes the ImageDisplayer class.
@@ -470,12 +354,12 @@ class ImageDisplayer:
             Key Actions:
                 - Creates the Toplevel Tkinter window with a title, geometry, and resizable properties.
                 - Creates a frame, canvas, and scrollbar inside the main window.
-                - Configures the canvas to have a scrollable frame inside.
+                - Sets up a virtual grid that only keeps tiles for the rows in view on the canvas.
                 - Binds the mouse wheel event to the on_mouse_wheel method.
                 - Binds the configure event to the check_window_size_and_call_button_clicked method (commented out).
-                - Initializes lists for images, recipe buttons, and recipes.
+                - Initializes the list of recipes.
                 - Calls the load_saved_recipes method to poplulate self.recipes
-                - Calls the button_clicked method to populate the scrollable frame.
+                - Calls the button_clicked method to populate the grid.
 
             Notes:
                 - The gui is set to only allow changing the size vertically. Increasing size horizontally made the gui look awful.
@@ -498,15 +382,12 @@ class ImageDisplayer:
         # Create a scrollbar inside the frame
         self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self.canvas.yview)
 
-        # Create a scrollable frame inside the canvas
-        self.scrollable_frame = tk.Frame(self.canvas)
-
-        # Configure the scrollable frame to update the canvas scroll region
-        self.scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        # Tiles sit straight on the canvas, and are moved to the rows in view whenever it scrolls or resizes
+        self.canvas.configure(yscrollcommand=self.on_canvas_scrolled)
+        self.canvas.bind("<Configure>", lambda e: self.update_visible_tiles())
 
-
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        # Only the tiles in or near the view exist, however many recipes there are
+        self.grid = VirtualGrid(3, self.cell_size, self.create_tile, self.bind_tile, self.hide_tile)
 
         # Pack the frame, canvas, and scrollbar
         self.frame.pack(fill="both", expand=True)
@@ -516,10 +397,12 @@ class ImageDisplayer:
         # Bind the mouse wheel event to the on_mouse_wheel method
         self.master.bind_all("<MouseWheel>", self.on_mouse_wheel)
 
-        # Create a list of images
-        self.images = []
-        self.recipe_buttons = []
         self.recipes = []
+        self.batches = []  # (ThumbnailBatch, recipe indices) for the images still being made
+        self.polling = False  # True while add_ready_images is scheduled
+
+        # Stop making thumbnails once the window is closed
+        self.master.protocol("WM_DELETE_WINDOW", self.close)
 
         if recipes:
             self.recipes = recipes
@@ -543,98 +426,126 @@ class ImageDisplayer:
         """Manages the Scrolling of the scrollable frame"""
         self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
 
+    @timed
     def button_clicked(self):
         """
-        This function populates the scrollable frame with images and buttons for each recipe.
+        This function populates the grid with an image and button for each recipe.
         It uses a grid layout to arrange the images and buttons in a 3xN configuration.
 
-        The function iterates through the list of recipes and for each recipe:
-        - Opens the image file using Pillow
-        - Resizes the image to a fixed size (400x400)
-        - Converts the resized image to a PhotoImage for Tkinter
-        - Creates a label and button for each image and adds them to the frame
-        - Appends the image and button to their respective lists
-
-        The function also updates the scroll region of the canvas to include all the images and buttons.
+        Tiles are only made for the rows in view, and reused for the rows scrolled into view
+        after that, so opening thousands of recipes costs no more than opening a handful.
         """
-        # Set the image size to a fixed size
-        image_width = 400
-        image_height = 400
-
-        # Initialize row and column variables to track the position of the images and buttons
-        row = 0
-        column = 0
-
-        # Iterate through the list of recipes
-        for recipe in self.recipes:
-            # Get the image name and path
-            image_name = recipe.image_name
-            Image_path = os.path.join("archive", "Food Images", image_name + ".jpg")
-
-            # Open the image and resize it using Pillow
-            try:
-                image = Image.open(Image_path)
-            except OSError as e:
-                print(f"Error opening image: {e}")
-                print(f"Invalid file path: {Image_path}")
-                continue
-            image = image.resize((image_width, image_height), Image.BICUBIC)
-
-            # Convert the resized image to a PhotoImage for Tkinter
-            image_tk = ImageTk.PhotoImage(image)
-
-            # Create a label and button for each image
-            label = tk.Label(self.scrollable_frame, image=image_tk)
-            label.grid(row=row, column=column, sticky="nsew")
-
-            recipe_button = tk.Button(self.scrollable_frame, text=recipe.title, height=2)
-            recipe_button.config(command=lambda recipe_button=recipe_button: self.button_clicked2(recipe_button))
-            recipe_button.grid(row=row+1, column=column, sticky="nsew")
-
-            #When the column variable exceeds 3 (i.e., the maximum number of columns), the row variable is incremented by 2 to create a new row,
-            # and the column variable is reset to 0. This ensures that the images and buttons are properly aligned in the grid layout.
-            column += 1
-            if column >= 3:
-                row += 2
-                column = 0
-
-            # Append the image and button to their respective lists
-            #This is necessary to prevent tkinter garbage collecting the widgets
-            self.images.append(image_tk)
-            self.recipe_buttons.append(recipe_button)
-
-        # Update the scroll region to include all the images and buttons
-        self.canvas.config(scrollregion=self.canvas.bbox(tk.ALL))
-
-
-
+        # Drop the images still being made for an earlier call
+        for batch, indices in self.batches:
+            batch.cancel()
+        self.batches = []
+
+        self.grid.reset(len(self.recipes))
+
+        # Update the scroll region to the height of every row, including the ones without tiles
+        self.canvas.config(scrollregion=(0, 0, self.grid.columns * self.grid.cell_width, self.grid.content_height()))
+        self.update_visible_tiles()
+
+    def on_canvas_scrolled(self, first, last):
+        """Keeps the scrollbar in step with the canvas and fills in the rows scrolled into view"""
+        self.scrollbar.set(first, last)
+        self.update_visible_tiles()
+
+    @timed
+    def update_visible_tiles(self):
+        """Moves the tiles to the rows in view and starts making the images of the ones that moved"""
+        shown = self.grid.update(self.canvas.canvasy(0), self.canvas.winfo_height())
+
+        # Stop making images for tiles that have already scrolled away again
+        still_wanted = []
+        for batch, indices in self.batches:
+            if any(index in self.grid.tiles for index in indices[batch.position:]):
+                still_wanted.append((batch, indices))
+            else:
+                batch.cancel()
+        self.batches = still_wanted
+
+        # Recipes known to have no image are never sent to the pipeline
+        shown = [index for index in shown if cookbook.image_exists(self.recipes[index].image_name)]
+        if shown:
+            image_names = [self.recipes[index].image_name for index in shown]
+            self.batches.append((thumbnail_pipeline.submit(image_names, self.image_size), shown))
+            if not self.polling:
+                self.add_ready_images()
+
+    @timed
+    def add_ready_images(self):
+        """
+        Puts every image that has arrived from the thumbnail pipeline on its tile, if the tile
+        is still showing that recipe, and checks again shortly until every image has arrived.
+        """
+        for batch, indices in self.batches:
+            for position, image in batch.ready():
+                tile = self.grid.tiles.get(indices[position])
+                if tile is None:
+                    continue  # scrolled away before the image arrived
+                if image is None:
+                    print(f"Invalid image name: {self.recipes[indices[position]].image_name}")
+                    tile.label.config(text="No image")
+                    continue
+
+                # Convert the resized image to a PhotoImage for Tkinter, which only lives as long as the tile shows it
+                tile.photo = ImageTk.PhotoImage(image)
+                tile.label.config(image=tile.photo, text="")
+
+        self.batches = [(batch, indices) for batch, indices in self.batches if not batch.done()]
+        self.polling = bool(self.batches)
+        if self.polling:
+            self.master.after(15, self.add_ready_images)
+
+    @timed
+    def create_tile(self):
+        """Creates an empty tile, a frame holding the image label and the recipe button, on the canvas"""
+        tile = tk.Frame(self.canvas, width=self.cell_size[0], height=self.cell_size[1])
+        tile.pack_propagate(False)  # keep every tile the size of its cell
+
+        tile.label = tk.Label(tile)
+        tile.label.pack(fill="both", expand=True)
+
+        tile.button = tk.Button(tile, height=2)
+        tile.button.config(command=lambda recipe_button=tile.button: self.button_clicked2(recipe_button))
+        tile.button.pack(fill="x")
+
+        tile.photo = None
+        tile.window = self.canvas.create_window(0, 0, window=tile, anchor="nw")
+        return tile
+
+    def bind_tile(self, tile, index):
+        """Moves a tile to the cell of the recipe at index and shows that recipe's title until its image arrives"""
+        x, y = self.grid.cell_origin(index)
+        self.canvas.coords(tile.window, x, y)
+        self.canvas.itemconfigure(tile.window, state="normal")
+        recipe = self.recipes[index]
+        tile.button.config(text=recipe.title)
+        tile.label.config(image="", text="Loading..." if cookbook.image_exists(recipe.image_name) else "No image")
+
+    def hide_tile(self, tile):
+        """Takes a tile off the canvas and lets go of its image"""
+        self.canvas.itemconfigure(tile.window, state="hidden")
+        tile.label.config(image="")
+        tile.photo = None
+
+    def close(self):
+        """Stops making the images still waiting and closes the window"""
+        for batch, indices in self.batches:
+            batch.cancel()
+        self.batches = []
+        self.master.destroy()
 
     def load_saved_recipes(self):
         """
-        Loads saved recipes from a JSON file into the recipes list.
+        Loads saved recipes from the pantry into the recipes list.
 
-        Opens the specified JSON file in read mode, loads the data into a dictionary,
-        and then iterates over the recipes in the dictionary. For each recipe, creates
-        a new Recipe object from the dictionary values and adds it to the recipes list.
+        The pantry is kept up to date as recipes are saved and removed, so this copies
+        its recipes instead of reading the JSON file, which may not hold the latest changes yet.
         """
 
-        filepath = r"archive\Sample.json"  # path to the JSON file
-
-        # Open the file in read mode
-        with open(filepath, 'r') as f:
-            # Load the JSON data into a dictionary
-            recipe_dict = json.load(f)
-
-        # Clear the existing recipes list
-        self.recipes = []
-
-        # Iterate over the recipes in the dictionary
-        for title, recipe_info in recipe_dict.items():
-            # Create a new Recipe object from the dictionary values
-            recipe = Recipe(title, recipe_info['ingredients'], recipe_info['instructions'], recipe_info['image_name'])
-
-            # Add the new recipe to the list
-            self.recipes.append(recipe)
+        self.recipes = list(pantry.recipes)
 
     def check_window_size_and_call_button_clicked(self, event):
         """
@@ -669,6 +580,7 @@ class ImageDisplayer:
             if recipe.title == recipe_button.cget("text"):
                 # Assuming 'window' is an instance of the other class
                 gui.update_text(recipe)
+                pantry.history.push(recipe)
                 break
 
     def mainloop(self):
@@ -679,3 +591,4 @@ window = ctk.CTk()
 gui = recipeGUI(window)
 #run
 window.mainloop()
+pantry.history.save()  # so the previous recipe button carries on where it left off next time
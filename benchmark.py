@@ -0,0 +1,239 @@
+"""
+Benchmarks the Cookbook, Pantry and image pipeline hot paths against synthetic datasets.
+
+Runs without a display. For each dataset size a CSV shaped like the real one is generated,
+along with a pool of JPEGs the recipes' image names point at, and every operation is timed
+over several runs. The results, with the peak memory each operation allocated, are printed
+and saved as JSON so two revisions can be compared:
+
+    python benchmark.py --sizes 10000,100000,1000000 --output before.json
+    python benchmark.py --sizes 10000,100000,1000000 --output after.json
+
+Generated datasets are kept in --workdir and reused by later runs with the same size and seed.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from recipe_core import Cookbook, Pantry, PantryStore, ThumbnailCache, ThumbnailPipeline
+
+
+# Words the synthetic titles, ingredients and instructions are made of
+TITLE_WORDS = ("chicken beef pork tofu salmon shrimp lemon garlic honey ginger roasted grilled braised spicy "
+               "sweet smoky crispy creamy herbed summer winter autumn salad soup stew tart pie cake bread "
+               "noodles rice tacos curry sauce with and apple pear berry chocolate vanilla maple basil").split()
+INGREDIENT_WORDS = ("flour sugar butter eggs milk salt pepper olive oil onion garlic tomato carrot celery "
+                    "thyme rosemary parsley cumin paprika vinegar stock cream cheese lemon lime").split()
+UNITS = ("cup", "cups", "tablespoon", "teaspoon", "pound", "ounce", "clove", "pinch")
+INSTRUCTION_WORDS = ("heat the oven stir until golden add season to taste simmer for minutes whisk "
+                     "together bake serve warm chop finely combine in a large bowl").split()
+
+SEARCH_QUERIES = ("chicken", "roasted garlic", "pie", "cre", "smoky maple salmon")  # broad, multi-word, short and rare
+
+
+def generate_dataset(directory, size, images, seed=0):
+    """
+    Writes a synthetic recipe CSV and a pool of JPEGs into directory, unless they are already there
+
+    Parameters:
+        directory (str): Folder to write the dataset into
+        size (int): Number of recipes
+        images (int): Number of distinct JPEGs, recipes share them round robin
+        seed (int): Seed for the random text, so a size and seed always give the same dataset
+
+    Returns:
+        tuple: (csv path, image folder)
+    """
+    csv_path = os.path.join(directory, "recipes.csv")
+    image_dir = os.path.join(directory, "Food Images")
+    if os.path.exists(csv_path) and os.path.isdir(image_dir):
+        return csv_path, image_dir
+
+    os.makedirs(image_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    image_names = [f"synthetic-recipe-{i}" for i in range(images)]
+    for i, image_name in enumerate(image_names):
+        # A smooth gradient plus noise, so the JPEGs compress and decode like photos rather than flat colour
+        x = np.linspace(0, 1, 274)[None, :, None]
+        y = np.linspace(0, 1, 169)[:, None, None]
+        base = rng.random(3) * 255
+        pixels = base * (0.5 + 0.5 * x) * (0.5 + 0.5 * y) + rng.normal(0, 12, (169, 274, 3))
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(os.path.join(image_dir, image_name + ".jpg"), quality=85)
+
+    def words(vocabulary, count):
+        return [" ".join(row) for row in np.asarray(vocabulary)[rng.integers(0, len(vocabulary), (size, count))]]
+
+    titles = [title.title() for title in words(TITLE_WORDS, 4)]
+    ingredient_rows = []
+    for amounts, units, names in zip(rng.integers(1, 4, (size, 8)), rng.integers(0, len(UNITS), (size, 8)),
+                                     rng.integers(0, len(INGREDIENT_WORDS), (size, 8))):
+        ingredient_rows.append(str([f"{amount} {UNITS[unit]} {INGREDIENT_WORDS[name]}"
+                                    for amount, unit, name in zip(amounts, units, names)]))
+    instructions = [sentence.capitalize() + "." for sentence in words(INSTRUCTION_WORDS, 40)]
+
+    dataframe = pd.DataFrame({
+        'Title': titles,
+        'Ingredients': ingredient_rows,
+        'Instructions': instructions,
+        'Image_Name': [image_names[i % images] for i in range(size)],
+        'Cleaned_Ingredients': ingredient_rows,
+    })
+    dataframe.to_csv(csv_path)  # the index becomes the "Unnamed: 0" column, like the real CSV
+    return csv_path, image_dir
+
+
+def measure(function, repeat):
+    """
+    Runs function repeat times and returns its timings, then once more to find the most memory it allocates
+
+    Tracing memory slows allocation heavy code down several times over, so the timed runs
+    are made without it. Peak memory is measured with tracemalloc, which sees Python objects
+    and NumPy arrays but not memory that C libraries such as Arrow or libjpeg allocate themselves.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'runs': repeat,
+        'min_ms': min(timings) * 1000,
+        'median_ms': statistics.median(timings) * 1000,
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'peak_bytes': peak,
+    }
+
+
+def remove_caches(csv_path, image_dir):
+    """Deletes the snapshot and index files the Cookbook keeps next to the CSV and images, so the next load is cold"""
+    base = os.path.splitext(csv_path)[0]
+    directory = os.path.dirname(csv_path)
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if path.startswith(base + ".") and path != csv_path:
+            os.remove(path)
+    image_index_path = os.path.normpath(image_dir) + ".index.pkl"
+    if os.path.exists(image_index_path):
+        os.remove(image_index_path)
+
+
+def benchmark_size(directory, size, images, repeat, seed):
+    """Generates the dataset for one size and times every operation on it, returning name -> result"""
+    print(f"Generating {size} recipes...")
+    csv_path, image_dir = generate_dataset(directory, size, images, seed)
+    results = {}
+
+    def run(name, function, runs=repeat):
+        results[name] = measure(function, runs)
+        print(f"  {name:<32} {results[name]['median_ms']:10.2f} ms   peak {results[name]['peak_bytes'] / 2**20:8.1f} MiB")
+
+    print(f"Benchmarking {size} recipes:")
+
+    # Loading, cold parses the CSV and builds every cache, warm reads them back
+    def cold_load():
+        remove_caches(csv_path, image_dir)
+        Cookbook(csv_loc=csv_path, image_dir=image_dir)
+    run("Cookbook.__init__ (cold)", cold_load, runs=1)
+    run("Cookbook.__init__ (warm)", lambda: Cookbook(csv_loc=csv_path, image_dir=image_dir))
+
+    cookbook = Cookbook(csv_loc=csv_path, image_dir=image_dir)
+    titles = cookbook.title_index.titles
+
+    run("search_recipes", lambda: [cookbook.search_recipes(query) for query in SEARCH_QUERIES])
+    sample_titles = [titles[i] for i in np.random.default_rng(seed).integers(0, len(titles), 100)]
+    run("fetch_specific_recipe x100", lambda: [cookbook.fetch_specific_recipe(title) for title in sample_titles])
+    run("get_random_recipes(1000)", lambda: cookbook.get_random_recipes(1000))
+    run("get_random_recipes(1000) + fields", lambda: [(recipe.title, recipe.instructions, recipe.ingredient_list)
+                                                      for recipe in cookbook.get_random_recipes(1000)])
+
+    # Saving, with a pantry of 1000 recipes in a throwaway snapshot
+    pantry_dir = os.path.join(directory, "pantry")
+    shutil.rmtree(pantry_dir, ignore_errors=True)
+    os.makedirs(pantry_dir)
+    pantry = Pantry(PantryStore(os.path.join(pantry_dir, "Sample.json")))
+    for recipe in cookbook.get_random_recipes(1000, seed=seed, replace=False):
+        pantry.add_recipe(recipe)
+    run("Pantry.write_recipe_dict_to_json", pantry.write_recipe_dict_to_json)
+    extra = cookbook.get_random_recipes(1, seed=seed + 1)[0]
+    run("Pantry.save_recipe", lambda: pantry.save_recipe(extra))
+
+    # One grid page of thumbnails, cold makes every thumbnail, warm reads them back from disk
+    page = [recipe.image_name for recipe in cookbook.get_random_recipes(99, seed=seed, replace=False)]
+    thumbnail_dir = os.path.join(directory, "Thumbnails")
+
+    def thumbnail_pass():
+        pipeline = ThumbnailPipeline(ThumbnailCache(thumbnail_dir, image_dir))
+        list(pipeline.submit(page, (400, 400)))
+        pipeline.shutdown()
+
+    def cold_thumbnail_pass():
+        shutil.rmtree(thumbnail_dir, ignore_errors=True)
+        thumbnail_pass()
+    run("grid thumbnail pass (cold)", cold_thumbnail_pass)
+    run("grid thumbnail pass (warm)", thumbnail_pass)
+
+    return results
+
+
+def git_revision():
+    """Returns the current git commit of the repository, or None outside a checkout"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma separated numbers of recipes")
+    parser.add_argument("--images", type=int, default=500, help="distinct JPEGs per dataset")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per operation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join("archive", "benchmark"), help="where the datasets are kept")
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON file to save the results to")
+    args = parser.parse_args(argv)
+
+    report = {
+        'revision': git_revision(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'images': args.images,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'results': {},
+    }
+    for size in (int(size) for size in args.sizes.split(",")):
+        directory = os.path.join(args.workdir, f"{size}-{args.seed}")
+        report['results'][str(size)] = benchmark_size(directory, size, args.images, args.repeat, args.seed)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print("Results saved to", args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+The data layer of the Recipe Generator, shared by the Tk and Qt front ends.
+
+Nothing here imports a GUI toolkit. Importing the package itself is nearly free:
+pandas, NumPy and Pillow are only imported when one of the names below is first
+used, and the dataset is only read when get_cookbook() is first called.
+
+    from recipe_core import get_cookbook
+    cookbook = get_cookbook()  # built once, then shared by every caller in the process
+"""
+import importlib
+import threading
+
+
+# Public name -> submodule that defines it, imported the first time the name is used
+_EXPORTS = {
+    'Recipe': 'recipe',
+    'Pantry': 'pantry',
+    'Cookbook': 'cookbook',
+    'PantryStore': 'pantry_store',
+    'RecipeHistory': 'history',
+    'TitleIndex': 'title_index',
+    'TextIndex': 'text_index',
+    'TitleCompleter': 'autocomplete',
+    'ImageIndex': 'image_index',
+    'ImageCache': 'image_service',
+    'ThumbnailCache': 'image_service',
+    'ThumbnailPipeline': 'image_service',
+    'image_cache': 'image_service',
+    'load_image': 'image_service',
+    'SearchWorker': 'search_service',
+    'VirtualGrid': 'virtual_grid',
+    'parse_ingredients': 'ingredients',
+    'normalize_ingredient': 'ingredients',
+    'Recommender': 'recommender',
+    'timed': 'instrumentation',
+    'span': 'instrumentation',
+    'count': 'instrumentation',
+}
+
+__all__ = sorted(_EXPORTS) + ['get_cookbook', 'get_pantry']
+
+_lock = threading.Lock()  # so two threads asking at once still share one cookbook and one pantry
+_cookbook = None
+_pantry = None
+
+
+def get_cookbook():
+    """Returns the process-wide Cookbook, loading the dataset the first time"""
+    global _cookbook
+    with _lock:
+        if _cookbook is None:
+            from .cookbook import Cookbook
+            _cookbook = Cookbook()
+        return _cookbook
+
+
+def get_pantry():
+    """Returns the process-wide Pantry, loading the saved recipes the first time"""
+    global _pantry
+    with _lock:
+        if _pantry is None:
+            from .pantry import Pantry
+            _pantry = Pantry()
+        return _pantry
+
+
+def __getattr__(name):
+    """Imports the submodule behind a public name the first time it is used"""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("." + _EXPORTS[name], __name__), name)
+    globals()[name] = value  # later lookups skip this function
+    return value
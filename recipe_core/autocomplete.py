@@ -0,0 +1,109 @@
+import numpy as np
+
+from .title_index import normalize
+
+
+class TitleCompleter:
+    """
+    Completes partly typed titles from a sorted array, for suggestions on every keystroke.
+
+    Every point where a word starts in a lowercased title is a key, so "bas" completes both
+    "Basil Pesto" and "Chicken Basil". The keys are kept sorted as (title, offset) pairs in two
+    int32 arrays rather than as copied strings, and the keys starting with a prefix are one
+    contiguous range found with two binary searches. The best titles in that range are picked
+    with a partial sort of a precomputed rank, so a one letter prefix matching thousands of
+    titles costs about the same as a long one.
+
+    Titles that start with the prefix rank before titles that only have a word starting with
+    it, and shorter titles rank first within each group.
+    """
+
+    VERSION = 1  # bump this whenever the layout changes, so saved copies are rebuilt
+
+    def __init__(self, title_index):
+        """
+        Builds the sorted keys
+
+        Parameters:
+            title_index (TitleIndex): The index whose normalized titles and static rank are completed from
+        """
+        self.normalized = title_index.normalized
+        positions, offsets = [], []
+        seen = set()
+        for position, title in enumerate(self.normalized):
+            if title in seen:
+                continue  # recipes sharing a title are completed once, by the first of them
+            seen.add(title)
+            for offset, char in enumerate(title):
+                if offset == 0 or (title[offset - 1] == " " and char != " "):
+                    positions.append(position)
+                    offsets.append(offset)
+
+        order = sorted(range(len(positions)), key=lambda i: self.normalized[positions[i]][offsets[i]:])
+        self.positions = np.array(positions, dtype=np.int32)[order]
+        self.offsets = np.array(offsets, dtype=np.int32)[order]
+
+        # Lower is better: titles starting with the key first, then by the title index's static rank
+        static_rank = np.asarray(title_index.static_rank, dtype=np.int32)
+        self.ranks = static_rank[self.positions] + (self.offsets > 0) * np.int32(len(self.normalized))
+
+    def __getstate__(self):
+        # The titles belong to the title index, which is saved on its own, so only the keys are pickled
+        state = self.__dict__.copy()
+        state['normalized'] = None
+        return state
+
+    def attach(self, title_index):
+        """
+        Points a completer loaded from disk back at the titles it was built from
+
+        Parameters:
+            title_index (TitleIndex): The index the completer was built from
+        """
+        self.normalized = title_index.normalized
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _key(self, i):
+        return self.normalized[self.positions[i]][self.offsets[i]:]
+
+    def _bisect(self, text):
+        """Returns the index of the first key not less than text"""
+        low, high = 0, len(self.positions)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < text:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns the row positions of the best titles with a word starting with prefix, each title once
+
+        Parameters:
+            prefix (str): What has been typed so far, case is ignored
+            limit (int): The maximum number of positions to return
+        """
+        prefix = normalize(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        low = self._bisect(prefix)
+        high = self._bisect(prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        ranks = self.ranks[low:high]
+
+        # A title with the prefix at more than one word start is a key more than once, so take a few spare
+        wanted = 2 * limit
+        while True:
+            if wanted < len(ranks):
+                best = np.argpartition(ranks, wanted - 1)[:wanted]
+            else:
+                best = np.arange(len(ranks))
+            best = best[np.argsort(ranks[best], kind='stable')]
+            results = list(dict.fromkeys(self.positions[low + best].tolist()))[:limit]
+            if len(results) == limit or wanted >= len(ranks):
+                return results
+            wanted *= 4
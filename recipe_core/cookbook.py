@@ -0,0 +1,274 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from .autocomplete import TitleCompleter
+from .dataset_cache import load_dataframe, load_derived
+from .image_index import ImageIndex
+from .image_service import IMAGE_DIR
+from .ingredients import PARSER_VERSION, add_ingredient_lists
+from .instrumentation import span, timed
+from .recipe import Recipe
+from .text_index import TextIndex
+from .title_index import TitleIndex
+
+pd.set_option('display.max_colwidth', None)
+
+
+CSV_PATH = r"archive\Food Ingredients and Recipe Dataset with Image Name Mapping.csv"  # path to the CSV file
+
+
+class Cookbook:
+    LIST_COLUMNS = ('Title', 'Image_Name')  # short columns every grid reads for every recipe, kept as Python lists
+
+    @timed("Cookbook.load")
+    def __init__(self, dataframe=None, csv_loc=CSV_PATH, image_dir=IMAGE_DIR):  # initialize the class with an optional dataframe parameter
+        self.csv_loc = csv_loc
+        # read the CSV, or its binary snapshot if it is up to date. The ingredients are parsed into lists once, when the snapshot is built
+        with span("Cookbook.load.dataframe"):
+            self.dataframe = load_dataframe(csv_loc, prepare=add_ingredient_lists, version=PARSER_VERSION)
+        with span("Cookbook.load.title_index"):
+            self.title_index = load_derived(csv_loc, "title_index", lambda: TitleIndex(self.dataframe['Title']),
+                                            TitleIndex.VERSION)  # trigram index for search_recipes
+
+        # Maps each title to the row position of its first occurrence, for fetch_specific_recipe
+        self.title_positions = {}
+        for position, title in enumerate(self.title_index.titles):
+            self.title_positions.setdefault(title, position)
+
+        self.column_lists = {}  # column name -> list of values, filled by recipe_field
+
+        # Which recipes have an image on disk, answered by the saved image index instead of opening the files
+        with span("Cookbook.load.image_index"):
+            self.image_index = ImageIndex.load(image_dir)
+        self.has_image = np.array([image_name in self.image_index for image_name in self.dataframe['Image_Name']], dtype=bool)
+        self.image_positions = np.flatnonzero(self.has_image)  # row positions of the recipes with an image
+
+        self._recommender = None  # built by the recommender property the first time it is used
+        self._text_index = None  # likewise for text_index
+        self._title_completer = None  # and for title_completer
+
+    def print_database(self):  # print the entire dataframe
+        print(self.dataframe)
+
+    @timed
+    def get_random_recipe(self):
+        """Fetch a random recipe from the dataframe"""
+        return self.get_random_recipes(1)[0]
+
+    @timed
+    def search_recipes(self, search_term, full_text=False):
+        """
+        Search for recipe titles containing every word of the given term, best matches first
+
+        Parameters:
+            search_term (str): The text to search for
+            full_text (bool): If True, recipes whose ingredients or instructions hold every word follow the title matches
+        """
+        if full_text:
+            return [self.title_index.titles[position] for position in self.search_positions(search_term)]
+        return self.title_index.search_titles(search_term)  # uses the trigram index instead of scanning every title
+
+    @property
+    def text_index(self):
+        """The full-text TextIndex, loaded from its cache file or built the first time it is used"""
+        if self._text_index is None:
+            with span("Cookbook.load.text_index"):
+                self._text_index = load_derived(self.csv_loc, "text_index", lambda: TextIndex(self.dataframe),
+                                                TextIndex.VERSION, update=lambda index: index.update(self.dataframe))
+        return self._text_index
+
+    @timed
+    def search_text(self, query, limit=None):
+        """Returns the row positions of the recipes whose title, ingredients or instructions hold every word of query, best first"""
+        return self.text_index.search(query, limit)
+
+    @timed
+    def search_positions(self, query, limit=None):
+        """
+        Returns the row positions of the recipes matching query, the title matches first, then the full-text ones
+
+        Parameters:
+            query (str): The text to search for. Titles also match partial words, the full text only whole ones
+            limit (int): The maximum number of positions to return, or None for all
+        """
+        positions = []
+        for found in self.search_passes(query, limit):
+            positions += found
+            if limit is not None and len(positions) >= limit:
+                break  # the full-text pass is not needed
+        return positions[:limit]
+
+    def search_passes(self, query, limit=None):
+        """
+        Yields the row positions of the recipes matching query in two passes, the title matches and
+        then the full-text matches not already found. Each pass is only worked out once the one before
+        it has been used, so a SearchWorker can drop a stale search between them.
+
+        Parameters:
+            query (str): The text to search for, see search_positions
+            limit (int): The maximum number of title matches, or None for all
+        """
+        positions = self.title_index.search(query, limit)
+        yield positions
+        seen = set(positions)
+        yield [position for position in self.search_text(query) if position not in seen]
+
+    def find_title_position(self, title):
+        """
+        Returns the row position of the recipe with the given title, or None if there is none.
+
+        An exact title is a single dictionary lookup. Anything else falls back to the first
+        title, in dataset order, that starts with the given text at a word boundary.
+        """
+        position = self.title_positions.get(title)
+        if position is not None:
+            return position
+
+        pattern = re.compile(r"\b" + re.escape(title) + r"\b")  # word boundary escaping
+        for position in sorted(self.title_index.search(title)):  # only titles containing the text can match
+            if pattern.match(self.title_index.titles[position]):
+                return position
+        return None
+
+    @timed
+    def closest_titles(self, title, limit=10):
+        """Returns the titles closest to the given one, allowing for typos, closest first, each title once"""
+        titles = [self.title_index.titles[position] for position in self.title_index.fuzzy(title, 2 * limit)]
+        return list(dict.fromkeys(titles))[:limit]  # recipes that share a title are only suggested once
+
+    @property
+    def title_completer(self):
+        """The TitleCompleter for the search boxes, loaded from its cache file or built the first time it is used"""
+        if self._title_completer is None:
+            with span("Cookbook.load.title_completer"):
+                completer = load_derived(self.csv_loc, "title_completer", lambda: TitleCompleter(self.title_index),
+                                         (TitleCompleter.VERSION, TitleIndex.VERSION))  # keys point into the index
+                completer.attach(self.title_index)
+                self._title_completer = completer
+        return self._title_completer
+
+    @timed
+    def suggest_titles(self, text, limit=10):
+        """
+        Returns up to limit titles to suggest for what has been typed into a search box, each title once
+
+        Titles with a word starting with the text come first. If there are fewer than limit of
+        those, the rest are the closest titles allowing for typos, see closest_titles.
+        """
+        titles = [self.title_index.titles[position] for position in self.title_completer.complete(text, limit)]
+        if len(titles) < limit:
+            titles = list(dict.fromkeys(titles + self.closest_titles(text, limit)))[:limit]
+        return titles
+
+    @timed
+    def recipe_field(self, column, position):
+        """Returns one field of the recipe at the given row position, with newlines replaced by spaces"""
+        if column in self.LIST_COLUMNS:
+            values = self.column_lists.get(column)
+            if values is None:  # turned into a list the first time any recipe asks for it
+                values = [str(value).replace('\n', ' ') for value in self.dataframe[column].tolist()]
+                self.column_lists[column] = values
+            return values[position]
+
+        value = self.dataframe[column].iat[position]
+        if column == 'Ingredient_List':
+            return list(value)
+        return str(value).replace('\n', ' ')
+
+    def image_exists(self, image_name):
+        """Returns True if the image for image_name is on disk, without any disk access"""
+        return image_name in self.image_index
+
+    def recipes_at(self, positions):
+        """Builds the recipes at the given row positions, without copying any of their text"""
+        return [Recipe.from_row(self, int(position)) for position in positions]
+
+    @timed
+    def fetch_specific_recipe(self, title, fuzzy=False):
+        """
+        Fetch a specific recipe by title, or None if no recipe matches
+
+        Parameters:
+            title (str): The title, or the start of one
+            fuzzy (bool): If True and nothing matches, fetch the recipe with the closest title instead, see closest_titles
+        """
+        position = self.find_title_position(title)
+        if position is None and fuzzy:
+            closest = self.title_index.fuzzy(title, 1)
+            position = closest[0] if closest else None
+        if position is None:  # if no match is found
+            return None
+        return self.recipes_at([position])[0]
+
+    @timed
+    def fetch_many(self, titles):
+        """Fetch the recipes for a list of titles, skipping titles that are not found"""
+        positions = [self.find_title_position(title) for title in titles]
+        return self.recipes_at([position for position in positions if position is not None])
+
+    @timed
+    def get_random_recipes(self, num_recipes, seed=None, replace=True, with_images=True):
+        """
+        Get specified number of random recipes, drawn from the dataframe in a single sample
+
+        Parameters:
+            num_recipes (int): How many recipes to draw
+            seed (int): Seed for the random draw, so the same seed gives the same recipes
+            replace (bool): If False, no recipe is drawn twice and at most every recipe is returned
+            with_images (bool): If True, only draw recipes whose image is on disk, or any recipe if none has one
+        """
+        generator = np.random.default_rng(seed)
+        population = self.image_positions
+        if not with_images or len(population) == 0:  # no images indexed still gives recipes, just without pictures
+            population = np.arange(len(self.dataframe))
+        if replace:
+            positions = population[generator.integers(0, len(population), size=num_recipes)]
+        else:
+            positions = generator.choice(population, size=min(num_recipes, len(population)), replace=False)
+        return self.recipes_at(positions)
+
+
+    @property
+    def recommender(self):
+        """The ingredient Recommender, loaded from its cache file or built the first time it is used"""
+        if self._recommender is None:
+            from .recommender import Recommender  # SciPy is only imported once recommendations are asked for
+            with span("Cookbook.load.recommender"):
+                self._recommender = load_derived(self.csv_loc, "recommender",
+                                                 lambda: Recommender(self.dataframe['Ingredient_List']),
+                                                 (Recommender.VERSION, PARSER_VERSION))  # built from the parsed lists
+        return self._recommender
+
+    @timed
+    def similar_recipes(self, recipe, count=20):
+        """
+        Returns (recipe, score) pairs for the recipes whose ingredients are most like the given recipe's,
+        most alike first. The score is the cosine similarity of their ingredients, from 0 to 1.
+
+        Parameters:
+            recipe (Recipe): The recipe to compare with, from the Cookbook or the Pantry
+            count (int): How many recipes to return at most
+        """
+        position = recipe.position_in(self)
+        if position is None:
+            position = self.title_positions.get(recipe.title)  # a saved recipe, found again by its title
+        if position is not None:
+            positions, scores = self.recommender.similar(position, count=count)
+        else:  # a recipe that isn't in the dataset is compared by its ingredients
+            positions, scores = self.recommender.similar(ingredients=recipe.ingredient_list, count=count)
+        return list(zip(self.recipes_at(positions), scores.tolist()))
+
+    @timed
+    def recipes_with_ingredients(self, ingredients, count=20):
+        """
+        Returns (recipe, missing) pairs for the recipes that can be made with the given ingredients and
+        the fewest others, best first. missing counts the ingredients the recipe needs besides them.
+
+        Parameters:
+            ingredients (list): The ingredients on hand, as names ("chicken") or ingredient lines
+            count (int): How many recipes to return at most
+        """
+        positions, missing = self.recommender.can_make(ingredients, count=count)
+        return list(zip(self.recipes_at(positions), missing.tolist()))
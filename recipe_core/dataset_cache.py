@@ -0,0 +1,179 @@
+import json
+import os
+import pickle
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional, fall back to a pickle snapshot without it
+    feather = None
+
+
+CACHE_VERSION = 1  # bump this whenever the layout of the snapshot changes
+
+
+def _csv_stamp(csv_path):
+    """Returns the values that identify one version of the CSV on disk"""
+    stat = os.stat(csv_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def snapshot_paths(csv_path):
+    """Returns the (snapshot, metadata) paths that sit next to the given CSV"""
+    base, _ = os.path.splitext(csv_path)
+    extension = ".feather" if feather is not None else ".pkl"
+    return base + extension, base + ".cache.json"
+
+
+def _read_meta(meta_path):
+    """Reads the snapshot metadata, or None if it is missing or unreadable"""
+    try:
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data, indent=None):
+    """Writes data to path as JSON"""
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=indent)
+
+
+def _write_pickle(path, data):
+    """Writes data to path as a pickle"""
+    with open(path, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _write_atomic(path, writer, sync=False):
+    """
+    Calls writer() on a temporary file and moves it over path once it is complete.
+    With sync, the file is flushed to disk first, so a crash can't leave path empty.
+    The temporary file is removed if anything fails.
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # unique, so threads writing the same path don't share one
+    try:
+        writer(temp_path)
+        if sync:
+            with open(temp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)  # atomic, so a crash never leaves a half written snapshot
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def is_snapshot_fresh(csv_path, version=1):
+    """Returns True if the binary snapshot matches the current CSV on disk and the given version"""
+    snapshot_path, meta_path = snapshot_paths(csv_path)
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.exists(snapshot_path):
+        return False
+    return (meta.get('version') == [CACHE_VERSION, version]
+            and meta.get('format') == os.path.splitext(snapshot_path)[1]
+            and meta.get('csv') == _csv_stamp(csv_path))
+
+
+def write_snapshot(csv_path, dataframe, stamp=None, version=1):
+    """
+    Writes the dataframe as a binary snapshot keyed on the CSV's mtime and size.
+
+    stamp should be taken before the CSV was parsed, so an edit made while parsing
+    is caught on the next start instead of being hidden behind a stale snapshot.
+    """
+    snapshot_path, meta_path = snapshot_paths(csv_path)
+    stamp = stamp or _csv_stamp(csv_path)
+    dataframe = dataframe.reset_index(drop=True)  # feather needs a default index
+
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # the old snapshot is no longer trusted while it is replaced
+
+    if feather is not None:
+        # Uncompressed so the snapshot can be memory-mapped on the next start
+        _write_atomic(snapshot_path, lambda p: feather.write_feather(dataframe, p, compression='uncompressed'))
+    else:
+        _write_atomic(snapshot_path, lambda p: dataframe.to_pickle(p))
+
+    meta = {
+        'version': [CACHE_VERSION, version],
+        'format': os.path.splitext(snapshot_path)[1],
+        'csv': stamp,
+    }
+    # The metadata is written last, so a snapshot is only trusted once it is complete
+    _write_atomic(meta_path, lambda p: _write_json(p, meta))
+
+
+def read_snapshot(csv_path):
+    """Reads the binary snapshot of the CSV, memory-mapping it when pyarrow is available"""
+    snapshot_path, _ = snapshot_paths(csv_path)
+    if feather is not None:
+        return feather.read_table(snapshot_path, memory_map=True).to_pandas()
+    return pd.read_pickle(snapshot_path)
+
+
+def load_dataframe(csv_path, prepare=None, version=1):
+    """
+    Loads the recipe dataset, using the binary snapshot whenever it is up to date.
+
+    The CSV stays the source of truth. If the snapshot is missing, from an older
+    cache version, or the CSV's mtime or size changed, the CSV is parsed again and
+    a new snapshot is written for the next start.
+
+    prepare, if given, is called with the freshly parsed dataframe and returns it with
+    any derived columns added, so that work is stored in the snapshot and only done once.
+    Bump version whenever prepare changes what it adds.
+    """
+    if is_snapshot_fresh(csv_path, version):
+        try:
+            return read_snapshot(csv_path)
+        except Exception as e:  # a damaged snapshot is rebuilt from the CSV below
+            print("Error reading dataset cache, rebuilding:", e)
+
+    stamp = _csv_stamp(csv_path)
+    dataframe = pd.read_csv(csv_path, index_col=False)  # read the CSV file into a Pandas dataframe
+    if prepare is not None:
+        dataframe = prepare(dataframe)
+    try:
+        write_snapshot(csv_path, dataframe, stamp, version)
+    except OSError as e:  # a read only dataset folder just means no cache
+        print("Error writing dataset cache:", e)
+    return dataframe
+
+
+def load_derived(csv_path, name, build, version=1, update=None):
+    """
+    Loads an object derived from the dataset, such as a search index, from its cache file.
+
+    The object is pickled next to the CSV under the given name and keyed on the CSV's
+    mtime and size like the snapshot. If the file is missing or stale, build() is called
+    and its result is saved for the next start. Bump version when the object's layout changes.
+
+    If update is given, a stale object of the current version is passed to update() instead
+    of calling build(), and update returns it brought up to date with the changed CSV, so
+    an object that can tell which rows changed only redoes the work for those.
+    """
+    path = os.path.splitext(csv_path)[0] + "." + name + ".pkl"
+    stamp = _csv_stamp(csv_path)
+    stale = None
+
+    try:
+        with open(path, 'rb') as f:
+            saved = pickle.load(f)
+        if saved['version'] == (CACHE_VERSION, version):
+            if saved['csv'] == stamp:
+                return saved['data']
+            stale = saved['data']
+    except FileNotFoundError:
+        pass
+    except Exception as e:  # a damaged cache file is rebuilt below
+        print(f"Error reading {name} cache, rebuilding:", e)
+
+    data = build() if stale is None or update is None else update(stale)
+    try:
+        _write_atomic(path, lambda p: _write_pickle(p, {'version': (CACHE_VERSION, version), 'csv': stamp, 'data': data}))
+    except OSError as e:
+        print(f"Error writing {name} cache:", e)
+    return data
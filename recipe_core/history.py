@@ -0,0 +1,127 @@
+import collections
+import json
+
+from .dataset_cache import _write_atomic, _write_json
+from .recipe import Recipe
+
+
+class RecipeHistory:
+    """
+    The recently viewed recipes, newest last, with back and forward navigation like a browser.
+
+    The recipes are kept in a deque with a maximum length, so showing a recipe is one append
+    however deep the history is, and the oldest recipe drops off the other end by itself.
+    Going back only moves a cursor, and showing a new recipe after going back drops the
+    recipes that were ahead of it, the same as following a link after pressing back.
+
+    With a filepath the history can be saved when the program closes and is read back the
+    next time it starts.
+    """
+
+    def __init__(self, depth=10, filepath=None):
+        """
+        Parameters:
+            depth (int): How many recipes to remember
+            filepath (str): JSON file the history is loaded from and saved to, or None to keep it in memory only
+        """
+        self.recipes = collections.deque(maxlen=depth)  # oldest first
+        self.steps_back = 0  # how far back from the newest recipe the current one is
+        self.filepath = filepath
+        if filepath is not None:
+            self.load()
+
+    @property
+    def depth(self):
+        return self.recipes.maxlen
+
+    @property
+    def current(self):
+        """The recipe being shown, or None if nothing has been shown yet"""
+        if not self.recipes:
+            return None
+        return self.recipes[-1 - self.steps_back]
+
+    def push(self, recipe):
+        """Makes recipe the current one, dropping any recipes ahead of the current one first"""
+        for _ in range(self.steps_back):
+            self.recipes.pop()
+        self.steps_back = 0
+        current = self.current
+        if current is not None and current.title == recipe.title:
+            self.recipes[-1] = recipe  # showing the same recipe again isn't another step back
+        else:
+            self.recipes.append(recipe)
+
+    def can_go_back(self):
+        return self.steps_back < len(self.recipes) - 1
+
+    def can_go_forward(self):
+        return self.steps_back > 0
+
+    def back(self, wrap=False):
+        """
+        Steps back to the recipe shown before the current one and returns it
+
+        Parameters:
+            wrap (bool): If True, stepping back from the oldest recipe goes to the newest one
+
+        Returns None and stays put if there is nowhere to go.
+        """
+        if self.can_go_back():
+            self.steps_back += 1
+        elif wrap and self.steps_back:
+            self.steps_back = 0
+        else:
+            return None
+        return self.current
+
+    def forward(self):
+        """Steps forward to the recipe shown after the current one and returns it, or None if it is the newest"""
+        if not self.can_go_forward():
+            return None
+        self.steps_back -= 1
+        return self.current
+
+    def clear(self):
+        self.recipes.clear()
+        self.steps_back = 0
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def __iter__(self):
+        """Iterates over the recipes newest first"""
+        return reversed(self.recipes)
+
+    def load(self):
+        """Reads the history saved in filepath, keeping the newest recipes if it holds more than depth"""
+        self.clear()
+        try:
+            with open(self.filepath, 'r') as f:
+                saved = json.load(f)
+            for info in saved['recipes']:
+                self.recipes.append(Recipe(info['title'], info['ingredients'], info['instructions'], info['image_name']))
+            self.steps_back = min(int(saved.get('steps_back', 0)), max(len(self.recipes) - 1, 0))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print("Error loading recipe history:", e)
+            self.clear()
+
+    def save(self):
+        """Writes the history to filepath in one atomic step, if it has one"""
+        if self.filepath is None:
+            return
+        saved = {
+            'steps_back': self.steps_back,
+            'recipes': [{
+                'title': recipe.title,
+                'ingredients': recipe.ingredients,
+                'instructions': recipe.instructions,
+                'image_name': recipe.image_name
+            } for recipe in self.recipes]
+        }
+        try:
+            _write_atomic(self.filepath, lambda path: _write_json(path, saved), sync=True)
+        except OSError as e:
+            print("Error saving recipe history:", e)
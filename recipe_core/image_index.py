@@ -0,0 +1,132 @@
+import collections
+import os
+import pickle
+
+from PIL import Image
+
+from .dataset_cache import _write_atomic, _write_pickle
+from .image_service import IMAGE_DIR
+
+
+# What the index knows about one image, without opening it again
+ImageInfo = collections.namedtuple('ImageInfo', ['image_name', 'path', 'bytes', 'width', 'height', 'mtime_ns'])
+
+
+class ImageIndex:
+    """
+    A saved list of the recipe images on disk, with the size, dimensions and mtime of each.
+
+    The first load reads the header of every image in the folder, which only takes the
+    width and height and does not decode the pixels. The result is pickled next to the
+    folder. Later loads trust the saved index as long as the folder's own mtime is the
+    same, so a start never stats every image. Otherwise the folder is listed again, files
+    whose size and mtime are unchanged keep their entry, and only new or changed files
+    have their header read.
+
+    The folder's mtime changes when an image is added, removed, renamed or replaced by
+    moving a new file over it, but not when an existing file is overwritten in place.
+    An image edited that way keeps its old size, dimensions and mtime in the index until
+    the folder changes for another reason. Whether it exists is still right, and the
+    ThumbnailCache stats the source image itself, so thumbnails are never stale.
+
+    Looking an image_name up in the index then answers whether it exists, and how
+    large it is, without touching the disk.
+    """
+
+    VERSION = 1  # bump this whenever the saved layout changes, so saved copies are rebuilt
+
+    def __init__(self, image_dir=IMAGE_DIR, index_path=None):
+        """
+        Parameters:
+            image_dir (str): Folder holding one JPEG per recipe image_name
+            index_path (str): Where to save the index, next to image_dir if None
+        """
+        self.image_dir = image_dir
+        self.index_path = index_path or os.path.normpath(image_dir) + ".index.pkl"
+        self.entries = {}  # image_name -> (bytes, width, height, mtime_ns), plain tuples so the index loads fast
+        self.folder_mtime_ns = None  # mtime of image_dir when it was last scanned
+
+    @classmethod
+    def load(cls, image_dir=IMAGE_DIR, index_path=None):
+        """Loads the saved index, brings it up to date with the folder and saves it again if anything changed"""
+        index = cls(image_dir, index_path)
+        try:
+            with open(index.index_path, 'rb') as f:
+                saved = pickle.load(f)
+            if saved['version'] == cls.VERSION:
+                index.entries = saved['entries']
+                index.folder_mtime_ns = saved['folder_mtime_ns']
+        except FileNotFoundError:
+            pass
+        except Exception as e:  # a damaged index is rebuilt by refresh
+            print("Error reading image index, rebuilding:", e)
+
+        if index.refresh():
+            index.save()
+        return index
+
+    def refresh(self):
+        """
+        Rescans the folder if its mtime changed, only reading the headers of new or changed images.
+        Returns True if anything changed. Images overwritten in place don't change the folder's mtime, see the class docstring.
+        """
+        try:
+            folder_mtime_ns = os.stat(self.image_dir).st_mtime_ns
+            if folder_mtime_ns == self.folder_mtime_ns:
+                return False  # nothing added, removed or renamed since the last scan
+            listing = list(os.scandir(self.image_dir))
+        except OSError as e:
+            print("Error reading image folder:", e)
+            folder_mtime_ns, listing = None, []
+
+        entries = {}
+        changed = False
+        for entry in listing:
+            image_name, extension = os.path.splitext(entry.name)
+            if extension != ".jpg" or not entry.is_file():
+                continue
+            stat = entry.stat()
+
+            old = self.entries.get(image_name)
+            if old is not None and old[0] == stat.st_size and old[3] == stat.st_mtime_ns:
+                entries[image_name] = old
+                continue
+
+            changed = True
+            try:
+                with Image.open(entry.path) as image:  # only reads the header
+                    width, height = image.size
+            except OSError:
+                continue  # not a readable image, so treated as missing
+            entries[image_name] = (stat.st_size, width, height, stat.st_mtime_ns)
+
+        changed = changed or len(entries) != len(self.entries) or folder_mtime_ns != self.folder_mtime_ns
+        self.entries = entries
+        self.folder_mtime_ns = folder_mtime_ns
+        return changed
+
+    def save(self):
+        """Saves the index next to the image folder, replacing the old copy in one step"""
+        saved = {'version': self.VERSION, 'folder_mtime_ns': self.folder_mtime_ns, 'entries': self.entries}
+        try:
+            _write_atomic(self.index_path, lambda path: _write_pickle(path, saved))
+        except OSError as e:  # a read only folder just means the headers are read again next start
+            print("Error writing image index:", e)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, image_name):
+        return image_name in self.entries
+
+    def get(self, image_name):
+        """Returns the ImageInfo of image_name, or None if there is no such image"""
+        entry = self.entries.get(image_name)
+        if entry is None:
+            return None
+        return ImageInfo(image_name, os.path.join(self.image_dir, image_name + ".jpg"), *entry)
+
+    def dimensions(self, image_name):
+        """Returns the (width, height) of image_name, or None if there is no such image"""
+        entry = self.entries.get(image_name)
+        return None if entry is None else entry[1:3]
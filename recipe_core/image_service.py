@@ -0,0 +1,310 @@
+import collections
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .dataset_cache import _write_atomic
+from .instrumentation import count, timed
+
+
+IMAGE_DIR = os.path.join("archive", "Food Images")  # folder holding one JPEG per recipe image_name
+THUMBNAIL_DIR = os.path.join("archive", "Thumbnails")  # folder the thumbnail cache writes to
+IMAGE_CACHE_BUDGET = 128 * 1024 * 1024  # bytes of decoded images the shared image_cache may hold
+
+
+def image_path(image_name, image_dir=IMAGE_DIR):
+    """Returns the path of the full-size image for a recipe's image_name"""
+    return os.path.join(image_dir, image_name + ".jpg")
+
+
+def resize_image(image, size, fit=False):
+    """
+    Resizes a PIL image to size
+
+    Parameters:
+        image (PIL.Image): The image to resize
+        size (tuple): The (width, height) to resize to
+        fit (bool): If True, keep the aspect ratio and only shrink so the image fits inside size.
+            If False, stretch the image to exactly size, the way the Tk grid always has.
+    """
+    if fit:
+        image = image.copy()
+        image.thumbnail(size, Image.BICUBIC)
+        return image
+    return image.resize(size, Image.BICUBIC)
+
+
+@timed("image.decode")
+def open_image(source_path, size=None, fit=False):
+    """
+    Decodes an image file as an RGB PIL image, at about the size it is going to be shown at
+
+    JPEGs are decoded with draft(), which has the decoder scale them down by 1/2, 1/4 or 1/8
+    as it reads them, so a large photo shrunk to a tile is never held at full size. The
+    draft is never smaller than size, and resize_image then makes the exact size from it.
+
+    Parameters:
+        source_path (str): Path of the image file
+        size (tuple): The (width, height) to resize to, or None to keep the full size
+        fit (bool): Passed on to resize_image
+    """
+    with Image.open(source_path) as image:
+        if size is None:
+            return image.convert('RGB')
+
+        if fit:
+            # Only the size the image shrinks to inside the box is needed, not the whole box
+            scale = min(size[0] / image.width, size[1] / image.height, 1)
+            needed = (max(round(image.width * scale), 1), max(round(image.height * scale), 1))
+        else:
+            needed = size
+        image.draft('RGB', needed)  # does nothing for formats other than JPEG
+        decoded = image.convert('RGB')
+
+    return resize_image(decoded, size, fit)
+
+
+def load_image(image_name, size=None, fit=False, image_dir=IMAGE_DIR):
+    """
+    Returns the image for a recipe's image_name as an RGB PIL image, decoded at about size,
+    or None if the image is missing or can't be read. See open_image for the parameters.
+    """
+    try:
+        return open_image(image_path(image_name, image_dir), size, fit)
+    except OSError as e:
+        print(f"Error opening image: {e}")
+        return None
+
+
+class ThumbnailCache:
+    """
+    Keeps resized copies of the recipe images on disk, so they are only decoded and resampled once.
+
+    Each thumbnail is stored under a name hashed from the image_name, the source file's
+    modification time and the requested size. Editing or replacing a source image changes
+    its modification time, so the stale thumbnail is simply never asked for again.
+    Thumbnails are spread over 256 subfolders so no single folder grows too large.
+    """
+
+    def __init__(self, cache_dir=THUMBNAIL_DIR, image_dir=IMAGE_DIR, quality=90):
+        """
+        Parameters:
+            cache_dir (str): Folder to keep the thumbnails in, created when first needed
+            image_dir (str): Folder holding the full-size images
+            quality (int): JPEG quality the thumbnails are saved with
+        """
+        self.cache_dir = cache_dir
+        self.image_dir = image_dir
+        self.quality = quality
+
+    def _cache_path(self, image_name, mtime_ns, size, fit):
+        """Returns the path a thumbnail with these properties is stored at"""
+        key = f"{image_name}|{mtime_ns}|{size[0]}x{size[1]}|{'fit' if fit else 'stretch'}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".jpg")
+
+    def _create(self, source_path, cache_path, size, fit):
+        """Decodes and resizes the source image and saves the result, returning the resized image"""
+        thumbnail = open_image(source_path, size, fit)
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        try:
+            # Atomic, so a half written thumbnail is never read, even with two threads making the same one
+            _write_atomic(cache_path, lambda path: thumbnail.save(path, "JPEG", quality=self.quality))
+        except OSError as e:  # a read only cache folder just means the thumbnail is made again next time
+            print("Error writing thumbnail:", e)
+        return thumbnail
+
+    @timed
+    def get(self, image_name, size, fit=False):
+        """
+        Returns the thumbnail for image_name as a PIL image, or None if the source image is missing.
+        A cached thumbnail is read from disk, otherwise it is made from the source image and cached.
+        """
+        source_path = image_path(image_name, self.image_dir)
+        try:
+            mtime_ns = os.stat(source_path).st_mtime_ns
+        except OSError:
+            return None
+
+        cache_path = self._cache_path(image_name, mtime_ns, size, fit)
+        try:
+            with Image.open(cache_path) as image:
+                image.load()
+                return image
+        except OSError:
+            pass  # not cached yet, or the cached file is damaged
+
+        try:
+            return self._create(source_path, cache_path, size, fit)
+        except OSError as e:
+            print(f"Error opening image: {e}")
+            return None
+
+
+class ImageCache:
+    """
+    A bounded in-memory cache of decoded images, keyed by image_name, size and fit.
+
+    Images are kept as PIL images, so every window can turn them into its own QPixmap or
+    PhotoImage without decoding the JPEG again. Once the decoded images add up to more
+    than the budget, the least recently used ones are dropped. The cached images are
+    shared, so callers must not change them. The cache is safe to use from several threads.
+    """
+
+    def __init__(self, budget=IMAGE_CACHE_BUDGET):
+        """
+        Parameters:
+            budget (int): The most bytes of decoded pixels to keep
+        """
+        self.budget = budget
+        self.images = collections.OrderedDict()  # (image_name, size, fit) -> PIL image, least recently used first
+        self.used = 0  # bytes held by images
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def image_bytes(image):
+        """Returns roughly how much memory a decoded PIL image takes"""
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, image_name, size=None, fit=False, load=None):
+        """
+        Returns the image for image_name at size, decoding it only if it isn't cached. Returns None if it is missing.
+
+        Parameters:
+            image_name (str): The recipe's image_name
+            size (tuple): The (width, height) to resize to, or None for the full size
+            fit (bool): Passed on to load, see resize_image
+            load (function): Called with (image_name, size, fit) on a miss, load_image if None
+        """
+        key = (image_name, None if size is None else tuple(size), fit)
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                self.hits += 1
+                count("ImageCache.hit")
+                return image
+            self.misses += 1
+        count("ImageCache.miss")
+
+        image = (load or load_image)(image_name, size, fit)  # decoded outside the lock, so other threads carry on
+        if image is not None:
+            self.put(key, image)
+        return image
+
+    def put(self, key, image):
+        """Adds an image to the cache, dropping the least recently used ones until it fits the budget"""
+        with self.lock:
+            old = self.images.pop(key, None)
+            if old is not None:
+                self.used -= self.image_bytes(old)
+            self.images[key] = image
+            self.used += self.image_bytes(image)
+            while self.used > self.budget and len(self.images) > 1:
+                _, dropped = self.images.popitem(last=False)
+                self.used -= self.image_bytes(dropped)
+
+    def clear(self):
+        """Drops every cached image, keeping the counters"""
+        with self.lock:
+            self.images.clear()
+            self.used = 0
+
+    def stats(self):
+        """Returns the hit and miss counts and how full the cache is, as a dictionary"""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'images': len(self.images),
+                    'bytes': self.used, 'budget': self.budget}
+
+
+image_cache = ImageCache()  # one cache for the whole process, so windows reuse each other's images
+
+
+class ThumbnailBatch:
+    """
+    The thumbnails of one ThumbnailPipeline.submit call, handed back in the order they were asked for.
+
+    ready() never blocks, so a GUI can call it from a timer and add each tile as soon as its
+    image and every image before it have arrived. Iterating the batch blocks instead, for scripts.
+    """
+
+    def __init__(self, futures):
+        self.futures = collections.deque(futures)
+        self.position = 0  # index of the next thumbnail to hand back
+
+    def _take(self):
+        """Removes the next future and returns (index, image), with None for a missing or unreadable image"""
+        future = self.futures.popleft()
+        index = self.position
+        self.position += 1
+        if future.cancelled():
+            return index, None
+        error = future.exception()
+        if error is not None:
+            print(f"Error making thumbnail: {error}")
+            return index, None
+        return index, future.result()
+
+    def ready(self):
+        """Returns the (index, image) pairs that have arrived, in order, without waiting for the rest"""
+        results = []
+        while self.futures and self.futures[0].done():
+            results.append(self._take())
+        return results
+
+    def done(self):
+        """Returns True once every thumbnail has been handed back"""
+        return not self.futures
+
+    def cancel(self):
+        """Drops every thumbnail not handed back yet, stopping the ones that haven't started"""
+        for future in self.futures:
+            future.cancel()
+        self.futures.clear()
+
+    def __iter__(self):
+        while self.futures:
+            yield self._take()
+
+
+class ThumbnailPipeline:
+    """
+    Makes thumbnails on a pool of worker threads, so a grid uses every core instead of one.
+
+    Pillow releases the GIL while it decodes, resizes and encodes, so threads run those
+    steps in parallel without a process pool having to copy every image back to the GUI.
+    The thumbnail cache is used as normal, so cached images are only read from disk.
+    """
+
+    def __init__(self, cache, max_workers=None, memory=None):
+        """
+        Parameters:
+            cache (ThumbnailCache): The cache the workers read thumbnails from and write them to
+            max_workers (int): How many images to work on at once, one per core if None
+            memory (ImageCache): In-memory cache checked before the thumbnail cache, if given
+        """
+        self.cache = cache
+        self.memory = memory
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1,
+                                           thread_name_prefix="thumbnails")
+
+    def submit(self, image_names, size, fit=False):
+        """Starts making thumbnails for every image name, returning a ThumbnailBatch that yields them in order"""
+        return ThumbnailBatch([self.executor.submit(self.load, image_name, size, fit)
+                               for image_name in image_names])
+
+    def load(self, image_name, size, fit=False):
+        """Returns one thumbnail, from memory if it was made recently"""
+        if self.memory is None:
+            return self.cache.get(image_name, size, fit)
+        return self.memory.get(image_name, size, fit, self.cache.get)
+
+    def shutdown(self):
+        """Stops the worker threads once the images already started are done"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,110 @@
+import ast
+import re
+
+
+PARSER_VERSION = 1  # bump this whenever parse_ingredients changes, so cached lists are rebuilt
+
+# Splits on commas that are outside quotes, for strings that are not a valid Python list
+_SPLIT_RE = re.compile(r""",(?=(?:[^'"]*['"][^'"]*['"])*[^'"]*$)""")
+
+
+def parse_ingredients(ingredients):
+    """
+    Turns the string form of a Python list of ingredients into a real list
+
+    Parameters:
+        ingredients (str): The ingredients as stored in the dataset, e.g. "['1 cup flour', '2 eggs']"
+
+    Returns:
+        list: One string per ingredient, with commas inside an ingredient left alone
+    """
+    if not isinstance(ingredients, str):
+        return []  # missing ingredients
+
+    try:
+        parsed = ast.literal_eval(ingredients)
+    except (ValueError, SyntaxError):
+        parsed = None
+
+    if isinstance(parsed, (list, tuple)):
+        items = [str(item) for item in parsed]
+    else:
+        # Not a list literal, split it by hand the way the viewers used to
+        trimmed = ingredients.strip()
+        if trimmed.startswith("[") and trimmed.endswith("]"):
+            trimmed = trimmed[1:-1]
+        items = [item.strip().strip("'\"") for item in _SPLIT_RE.split(trimmed)]
+
+    return [" ".join(item.split()) for item in items if item.strip()]  # replace newlines with spaces
+
+
+def add_ingredient_lists(dataframe):
+    """Adds an Ingredient_List column holding the parsed Ingredients of every row"""
+    dataframe['Ingredient_List'] = [parse_ingredients(ingredients) for ingredients in dataframe['Ingredients']]
+    return dataframe
+
+
+# Words that say how much of an ingredient to use or how to prepare it, dropped by normalize_ingredient
+UNITS = frozenset("""
+    cup cups tablespoon tablespoons tbsp tbs teaspoon teaspoons tsp pound pounds lb lbs ounce ounces oz
+    gram grams g kg kilogram kilograms ml milliliter milliliters l liter liters litre litres quart quarts qt
+    pint pints gallon gallons pinch pinches dash dashes can cans jar jars bottle bottles package packages
+    pkg box boxes bag bags stick sticks slice slices piece pieces sprig sprigs bunch bunches head heads
+    clove cloves handful handfuls inch inches envelope envelopes container containers drop drops
+""".split())
+DESCRIPTORS = frozenset("""
+    a an of the for to taste about plus more as needed optional divided such into cut in at room temperature
+    fresh freshly frozen dried dry thawed chopped finely coarsely roughly minced diced sliced thinly thickly
+    grated shredded crushed crumbled ground peeled seeded pitted stemmed trimmed halved quartered cubed
+    packed softened melted beaten whisked rinsed drained washed scrubbed toasted lightly large small medium
+    extra virgin kosher fine coarse whole boneless skinless unsalted salted low-sodium low-salt reduced-sodium
+    organic preferably good-quality quality store-bought homemade cold warm hot ripe firm very well
+    serving garnish
+""".split())
+
+_PAREN_RE = re.compile(r"\([^)]*\)")
+_ALTERNATIVES_RE = re.compile(r"\s+(?:and|or)\s+|\s*&\s*")
+_WORD_RE = re.compile(r"[a-zà-ÿ]+(?:-[a-zà-ÿ]+)*")
+
+
+def singular(word):
+    """Crudely turns a plural word singular, so "tomatoes" and "tomato" are the same ingredient"""
+    if len(word) <= 3 or word.endswith(("ss", "sses")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(ingredient):
+    """
+    Reduces one line of a recipe's ingredients to the names of the ingredients in it
+
+    Quantities, units, preparation notes and anything in brackets or after a comma are dropped,
+    and words are made singular, so "2 garlic cloves, peeled" and "1 clove garlic" both become
+    "garlic". A line offering alternatives gives one name for each of them.
+
+    Parameters:
+        ingredient (str): One line of ingredients, e.g. "1 cup chopped fresh strawberries, stemmed"
+
+    Returns:
+        list: The ingredient names, e.g. ["strawberry"], empty for a line that names none
+    """
+    if not isinstance(ingredient, str) or ":" in ingredient:
+        return []  # notes such as "Ingredient info: ..." are not ingredients
+
+    text = _PAREN_RE.sub(" ", ingredient.lower())
+    text = re.split(r"[,;]", text, maxsplit=1)[0]  # everything after a comma says how to prepare it
+
+    names = []
+    for part in _ALTERNATIVES_RE.split(text):
+        words = [singular(word) for word in _WORD_RE.findall(part)
+                 if len(word) > 1 and word not in UNITS and word not in DESCRIPTORS and not word.endswith("-ounce")]
+        name = " ".join(words)
+        if name and name not in names:
+            names.append(name)
+    return names
@@ -0,0 +1,215 @@
+"""
+Opt-in latency instrumentation for the Cookbook, Pantry, image loading and GUI paths.
+
+Nothing is recorded unless the RECIPE_PROFILE environment variable is set when the program
+starts. Without it, timed() hands back the function it decorates untouched and span() is
+a shared do-nothing context manager, so the instrumentation costs nothing in normal use.
+
+    RECIPE_PROFILE=1 python NewPyQT.py            # print a latency summary on exit
+    RECIPE_PROFILE=trace python NewPyQT.py        # also write recipe-trace-<pid>.json
+    RECIPE_PROFILE=slow.json python NewPyQT.py    # also write the trace to slow.json
+
+The trace is in the Chrome trace event format, so it opens in chrome://tracing or
+https://ui.perfetto.dev with nested spans shown per thread.
+"""
+import atexit
+import collections
+import contextlib
+import functools
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+
+PROFILE_ENV = "RECIPE_PROFILE"  # environment variable that turns the instrumentation on
+EVENT_LIMIT = 1_000_000  # most trace events kept, the oldest are dropped after that
+BUCKETS_PER_DOUBLING = 4  # histogram resolution, each bucket is about 19% wider than the one before
+
+
+class Histogram:
+    """
+    The latencies of one operation, kept as counts in log-spaced buckets so memory stays
+    constant however many calls are made. Percentiles are estimated from the buckets.
+    """
+
+    def __init__(self):
+        self.buckets = collections.Counter()  # bucket number -> calls
+        self.calls = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    @staticmethod
+    def bucket(duration_ns):
+        """Returns the bucket a duration falls in, bucket 0 holding everything under a microsecond"""
+        if duration_ns < 1000:
+            return 0
+        return int(math.log2(duration_ns / 1000) * BUCKETS_PER_DOUBLING) + 1
+
+    @staticmethod
+    def bucket_limit_ns(bucket):
+        """Returns the longest duration that falls in a bucket"""
+        return 1000 * 2 ** (bucket / BUCKETS_PER_DOUBLING)
+
+    def add(self, duration_ns):
+        self.buckets[self.bucket(duration_ns)] += 1
+        self.calls += 1
+        self.total_ns += duration_ns
+        self.min_ns = duration_ns if self.min_ns is None else min(self.min_ns, duration_ns)
+        self.max_ns = max(self.max_ns, duration_ns)
+
+    def percentile(self, percent):
+        """Returns about the duration in nanoseconds that percent of the calls took no longer than"""
+        wanted = math.ceil(self.calls * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= wanted:
+                return min(self.bucket_limit_ns(bucket), self.max_ns)
+        return self.max_ns
+
+
+class Recorder:
+    """Collects the histograms, counters and trace events of one process. Safe to use from several threads."""
+
+    def __init__(self):
+        self.histograms = collections.defaultdict(Histogram)  # operation name -> Histogram
+        self.counters = collections.Counter()  # counter name -> total
+        self.events = collections.deque(maxlen=EVENT_LIMIT)  # (name, thread id, start ns, duration ns)
+        self.dropped = 0  # events pushed out of self.events by newer ones
+        self.threads = {}  # thread id -> thread name, for the trace
+        self.start_ns = time.perf_counter_ns()
+        self.lock = threading.Lock()
+
+    def record(self, name, start_ns, duration_ns):
+        """Adds one call of the named operation, which started at start_ns"""
+        thread = threading.current_thread()
+        with self.lock:
+            self.histograms[name].add(duration_ns)
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append((name, thread.ident, start_ns, duration_ns))
+            self.threads.setdefault(thread.ident, thread.name)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def summary(self):
+        """Returns the latency table and counters as text, slowest total time first"""
+        with self.lock:
+            histograms = sorted(self.histograms.items(), key=lambda item: item[1].total_ns, reverse=True)
+            lines = [f"{'operation':<40} {'calls':>8} {'total ms':>10} {'mean ms':>9} "
+                     f"{'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+            for name, histogram in histograms:
+                lines.append(f"{name:<40} {histogram.calls:>8} {histogram.total_ns / 1e6:>10.1f} "
+                             f"{histogram.total_ns / histogram.calls / 1e6:>9.3f} "
+                             f"{histogram.percentile(50) / 1e6:>9.3f} {histogram.percentile(90) / 1e6:>9.3f} "
+                             f"{histogram.percentile(99) / 1e6:>9.3f} {histogram.max_ns / 1e6:>9.3f}")
+            for name, total in sorted(self.counters.items()):
+                lines.append(f"{name:<40} {total:>8}")
+            if self.dropped:
+                lines.append(f"({self.dropped} of the oldest trace events were dropped)")
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Returns the recorded calls in the Chrome trace event format, as a dictionary ready for json.dump"""
+        pid = os.getpid()
+        with self.lock:
+            events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                      for tid, name in self.threads.items()]
+            events.extend({'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': (start_ns - self.start_ns) / 1000, 'dur': duration_ns / 1000}
+                          for name, tid, start_ns, duration_ns in self.events)
+            counters = dict(self.counters)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'counters': counters}}
+
+    def write_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def _trace_path(setting):
+    """Returns where RECIPE_PROFILE asks the trace to be written, or None for a summary only"""
+    if setting.lower() in ("1", "true", "yes", "on", "summary"):
+        return None
+    if setting.lower() == "trace":
+        return f"recipe-trace-{os.getpid()}.json"
+    return setting
+
+
+_setting = os.environ.get(PROFILE_ENV, "").strip()
+enabled = _setting.lower() not in ("", "0", "false", "no", "off")
+recorder = Recorder() if enabled else None
+
+
+def timed(name=None):
+    """
+    Decorator that records how long every call of a function takes, when profiling is on
+
+    Parameters:
+        name (str): The operation name shown in the summary and trace, the function's qualified name if None
+
+    Can also be used bare, as @timed.
+    """
+    if callable(name):
+        return timed()(name)
+
+    def decorate(function):
+        if not enabled:
+            return function
+        operation = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                recorder.record(operation, start, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
+
+
+@contextlib.contextmanager
+def _span(name):
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        recorder.record(name, start, time.perf_counter_ns() - start)
+
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+def span(name):
+    """Context manager that records how long its block takes under the given name, when profiling is on"""
+    return _span(name) if enabled else _NO_SPAN
+
+
+def count(name, amount=1):
+    """Adds amount to the named counter, when profiling is on"""
+    if enabled:
+        recorder.count(name, amount)
+
+
+def dump():
+    """Prints the summary and writes the trace file, if RECIPE_PROFILE asked for one. Called on exit."""
+    if not enabled:
+        return
+    print(recorder.summary(), file=sys.stderr)
+    path = _trace_path(_setting)
+    if path is not None:
+        try:
+            recorder.write_trace(path)
+            print("Trace written to", path, file=sys.stderr)
+        except OSError as e:
+            print("Error writing trace:", e)
+
+
+if enabled:
+    atexit.register(dump)
@@ -0,0 +1,163 @@
+import inspect
+import os
+import weakref
+
+from .history import RecipeHistory
+from .instrumentation import timed
+from .pantry_store import PantryStore
+from .recipe import Recipe
+
+
+class Pantry:
+    """
+    The collection of saved recipes, plus the history of recently viewed ones.
+
+    Recipes are kept in a dictionary keyed by title, which keeps them in the order they were
+    saved, so looking up, adding, removing and checking for a title never scans the collection.
+    Pantry still behaves like a sequence through len(), indexing and iteration.
+
+    Windows that show saved recipes subscribe to the pantry and are told about each recipe
+    added or removed, so one pantry can be shared by every window without any of them
+    reading the JSON file again.
+    """
+
+    def __init__(self, store=None, history=None):
+        """
+        Parameters:
+            store (PantryStore): Where the saved recipes are kept, archive/Sample.json if None
+            history (RecipeHistory): The recently viewed recipes, kept next to the store's snapshot if None
+        """
+        self.recipes_by_title = {}  # title -> Recipe, in the order the recipes were saved
+        self._recipe_list = None  # list form of recipes_by_title for indexing, rebuilt after a change
+        self.store = store or PantryStore()  # Sample.json plus a journal of the changes since it was written
+        self.subscribers = []  # weak references to the callbacks passed to subscribe
+        self.load_saved_recipes()
+        if history is None:
+            history = RecipeHistory(filepath=os.path.splitext(self.store.filepath)[0] + ".history.json")
+        self.history = history  # recently viewed recipes, for the previous and next buttons
+
+    @property
+    def recipes(self):
+        """The saved recipes as a list, in the order they were saved"""
+        if self._recipe_list is None:
+            self._recipe_list = list(self.recipes_by_title.values())
+        return self._recipe_list
+
+    def titles(self):
+        """Returns the titles of the saved recipes, in the order they were saved"""
+        return list(self.recipes_by_title)
+
+    def add_recipe(self, recipe):
+        """Add a new recipe to the collection, replacing any saved recipe with the same title"""
+        self.recipes_by_title[recipe.title] = recipe  # add the recipe to the dictionary of recipes
+        self._recipe_list = None
+        self.notify('added', recipe)
+
+    def get_recipe(self, title):
+        """Find a recipe by title and return it, or None if not found"""
+        return self.recipes_by_title.get(title)
+
+    def remove_recipe(self, title):
+        """Remove a recipe by title and return True if successful, or False if not found"""
+        recipe = self.recipes_by_title.pop(title, None)
+        if recipe is None:
+            return False  # if no match is found, return False
+        self._recipe_list = None
+        self.notify('removed', recipe)
+        return True  # return True if the recipe was removed
+
+    def subscribe(self, callback):
+        """
+        Calls callback(event, recipe) whenever a recipe is added or removed, with event being 'added' or 'removed'.
+        Bound methods are held weakly, so a window is not kept open just because it subscribed.
+        """
+        if inspect.ismethod(callback):
+            self.subscribers.append(weakref.WeakMethod(callback))
+        else:
+            self.subscribers.append(lambda: callback)
+
+    def unsubscribe(self, callback):
+        """Stops calling a callback passed to subscribe"""
+        self.subscribers = [ref for ref in self.subscribers if ref() is not None and ref() != callback]
+
+    def notify(self, event, recipe):
+        """Calls every subscribed callback with the event and the recipe it is about"""
+        for ref in list(self.subscribers):
+            callback = ref()
+            if callback is None:  # the window that subscribed is gone
+                self.subscribers.remove(ref)
+            else:
+                callback(event, recipe)
+
+
+    @timed
+    def save_recipe(self, recipe):
+        """Add a recipe to the collection and record it on disk with one small write"""
+        self.add_recipe(recipe)
+        self.store.save(self.recipe_info(recipe))
+
+    @timed
+    def unsave_recipe(self, title):
+        """Remove a recipe by title and record it on disk, returning True if it was saved"""
+        if not self.remove_recipe(title):
+            return False
+        self.store.remove(title)
+        return True
+
+    @staticmethod
+    def recipe_info(recipe):
+        """Converts a recipe to the dictionary it is saved as"""
+        return {  # create a dictionary to store the recipe info
+            'title': recipe.title,  # add the title
+            'ingredients': recipe.ingredients,  # add the ingredients
+            'instructions': recipe.instructions,  # add the instructions
+            'image_name': recipe.image_name  # add the image name
+        }
+
+    def to_dict(self):
+        """Converts the recipe list to a dictionary"""
+        return {recipe.title: self.recipe_info(recipe) for recipe in self.recipes}
+
+
+    @timed
+    def write_recipe_dict_to_json(self):
+        """Rewrites the whole recipe dictionary to the JSON file. save_recipe and unsave_recipe only write the change"""
+        self.store.write_all(self.to_dict())
+
+
+    @timed
+    def load_saved_recipes(self):
+        """Loads the saved recipes from the JSON file and the journal of changes made since it was written"""
+        recipe_dict = self.store.load()
+
+        # Clear the existing recipes
+        self.recipes_by_title = {}
+        self._recipe_list = None
+
+        # Iterate over the recipes in the dictionary
+        for title, recipe_info in recipe_dict.items():
+            # Create a new Recipe object from the dictionary values
+            recipe = Recipe(title, recipe_info['ingredients'], recipe_info['instructions'], recipe_info['image_name'])
+
+            # Add the new recipe to the dictionary
+            self.recipes_by_title[title] = recipe
+
+
+    def remove_recipe_from_json(self, title):
+        """Records on disk that the recipe with the given title was removed"""
+        self.store.remove(title)
+
+
+    def __len__(self):
+        return len(self.recipes_by_title)
+
+    def __getitem__(self, index):
+        return self.recipes[index]
+
+    def __iter__(self):
+        return iter(self.recipes_by_title.values())
+
+    def __contains__(self, item):
+        """Checks whether a recipe, or a title, is saved in the pantry"""
+        title = item if isinstance(item, str) else item.title
+        return title in self.recipes_by_title
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+
+from .dataset_cache import _write_atomic, _write_json
+
+
+_compact_locks = {}  # snapshot path -> lock, shared by every PantryStore on that path
+_compact_locks_guard = threading.Lock()
+
+
+def _compact_lock(path):
+    """Returns the lock that keeps compactions of the snapshot at path from overlapping"""
+    with _compact_locks_guard:
+        return _compact_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def _end_partial_line(f):
+    """Moves to the end of a binary file, ending a line cut short by a crash so it can't swallow the next one"""
+    f.seek(0, os.SEEK_END)
+    if f.tell() > 0:
+        f.seek(f.tell() - 1)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def _apply(entries, change):
+    """Applies one journal entry to a title -> recipe info dictionary"""
+    if change['op'] == 'save':
+        entries[change['recipe']['title']] = change['recipe']
+    elif change['op'] == 'remove':
+        entries.pop(change['title'], None)
+
+
+def _replay(path, entries):
+    """Applies every complete line of a journal file to entries, returning how many were applied"""
+    applied = 0
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    _apply(entries, json.loads(line))
+                except (ValueError, KeyError):
+                    continue  # a line cut short by a crash
+                applied += 1
+    except FileNotFoundError:
+        pass
+    return applied
+
+
+class PantryStore:
+    """
+    Keeps the saved recipes on disk as a JSON snapshot plus an append-only journal.
+
+    The snapshot is the existing Sample.json, so a pantry saved by an older version is
+    imported as-is. Every save or remove after that is one line appended to the journal,
+    which costs the same however many recipes are saved. Once enough lines pile up, the
+    journal is folded back into the snapshot on a background thread.
+
+    A crash can at worst leave a half written last line in the journal, which is skipped
+    on the next load. The snapshot itself is only ever replaced whole. Replaying a journal
+    twice gives the same result, so a crash part way through a compaction loses nothing.
+    """
+
+    def __init__(self, filepath=r"archive\Sample.json", compact_every=500):
+        """
+        Parameters:
+            filepath (str): Path to the JSON snapshot of the saved recipes
+            compact_every (int): How many journal lines to allow before compacting in the background
+        """
+        self.filepath = filepath
+        self.journal_path = os.path.splitext(filepath)[0] + ".journal.jsonl"
+        self.rotated_path = self.journal_path + ".old"  # journal being folded in by a compaction
+        self.compact_every = compact_every
+
+        self.journal_length = 0  # lines in the journal since the last compaction
+        self.lock = threading.Lock()  # guards the journal file
+        self.compact_lock = _compact_lock(filepath)  # taken before lock, never after
+        self.compactor = None  # the background compaction thread, while one is running
+
+    def _read_snapshot(self):
+        """Reads the JSON snapshot, returning title -> recipe info"""
+        try:
+            with open(self.filepath, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_snapshot(self, entries):
+        """Replaces the JSON snapshot with entries in one atomic step"""
+        # The old snapshot stays until the new one is complete and on disk
+        _write_atomic(self.filepath, lambda path: _write_json(path, entries, indent=4), sync=True)
+
+    def load(self):
+        """Reads the snapshot and replays the journal over it, returning title -> recipe info"""
+        with self.compact_lock, self.lock:
+            entries = self._read_snapshot()
+            _replay(self.rotated_path, entries)  # left behind if a compaction was interrupted
+            self.journal_length = _replay(self.journal_path, entries)
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb+') as journal:
+                    _end_partial_line(journal)
+
+        if self.journal_length >= self.compact_every:
+            self.compact_in_background()
+        return entries
+
+    def _append(self, change):
+        """Appends one change to the journal"""
+        with self.lock:
+            with open(self.journal_path, 'a') as f:
+                f.write(json.dumps(change) + "\n")
+                f.flush()
+                os.fsync(f.fileno())  # the change is on disk before the GUI reports it saved
+            self.journal_length += 1
+
+        if self.journal_length >= self.compact_every:
+            self.compact_in_background()
+
+    def save(self, recipe_info):
+        """Records a saved recipe, given as a dictionary with a 'title' key"""
+        self._append({'op': 'save', 'recipe': recipe_info})
+
+    def remove(self, title):
+        """Records that the recipe with the given title was removed"""
+        self._append({'op': 'remove', 'title': title})
+
+    def _rotate_journal(self):
+        """Moves the journal aside for compaction, keeping a rotated journal an earlier compaction left behind"""
+        if not os.path.exists(self.journal_path):
+            return
+        if not os.path.exists(self.rotated_path):
+            os.replace(self.journal_path, self.rotated_path)
+            return
+
+        with open(self.rotated_path, 'rb+') as rotated, open(self.journal_path, 'rb') as journal:
+            _end_partial_line(rotated)
+            rotated.write(journal.read())
+            rotated.flush()
+            os.fsync(rotated.fileno())
+        os.remove(self.journal_path)
+
+    def compact(self):
+        """Folds the journal into the snapshot, blocking until it is done"""
+        with self.compact_lock:
+            with self.lock:
+                self._rotate_journal()  # new changes go to a fresh journal
+                self.journal_length = 0
+
+            # Rebuilt from disk rather than memory, so changes journaled by another PantryStore are kept.
+            # The journal lock is not held here, so saves carry on while the snapshot is written.
+            entries = self._read_snapshot()
+            _replay(self.rotated_path, entries)
+            self._write_snapshot(entries)
+
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+
+    def write_all(self, recipe_dict):
+        """Replaces everything on disk with the given title -> recipe info dictionary"""
+        with self.compact_lock:
+            with self.lock:
+                self._rotate_journal()  # everything journaled so far is replaced
+                self.journal_length = 0
+            self._write_snapshot(recipe_dict)
+
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+
+    def compact_in_background(self):
+        """Starts a compaction on a background thread, unless one is already running"""
+        with self.lock:
+            if self.compactor is not None and self.compactor.is_alive():
+                return
+            self.compactor = threading.Thread(target=self._compact_quietly, daemon=True)
+            self.compactor.start()
+
+    def _compact_quietly(self):
+        """Runs compact, printing instead of raising since nothing is waiting on the thread"""
+        try:
+            self.compact()
+        except OSError as e:
+            print("Error compacting saved recipes:", e)
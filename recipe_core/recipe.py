@@ -0,0 +1,80 @@
+from .ingredients import parse_ingredients
+
+
+class Recipe:
+    """
+    Represents a recipe with title, ingredients, instructions, and image name
+
+    A recipe taken from the Cookbook only holds its row position. Each field is read from
+    the Cookbook's columns the first time it is used, so building thousands of recipes for
+    a browse is nearly free and instruction text is only copied out for recipes that are shown.
+    """
+
+    __slots__ = ('_source', '_position', '_title', '_ingredients', '_instructions', '_image_name', '_ingredient_list')
+
+    def __init__(self, title, ingredients, instructions, image_name, ingredient_list=None):
+        """Initializes a new Recipe object
+
+        Parameters:
+            title (str): The title of the recipe
+            ingredients (str): A list of ingredients, separated by commas
+            instructions (str): A list of instructions, separated by line breaks
+            image_name (str): The name of the image associated with the recipe
+            ingredient_list (list): The ingredients already parsed into a list, parsed from ingredients on first use if None
+        """
+        self._source = None  # recipes built from values don't read from a Cookbook
+        self._position = None
+        self._title = str(title)  # stores the title of the recipe
+        self._ingredients = str(ingredients)  # stores the ingredients as a string
+        self._instructions = str(instructions)  # stores the instructions as a string
+        self._image_name = str(image_name)  # stores the name of the image associated with the recipe
+        self._ingredient_list = None if ingredient_list is None else list(ingredient_list)
+
+    @classmethod
+    def from_row(cls, source, position):
+        """Creates a recipe that reads its fields from the given row position of a Cookbook when they are used"""
+        recipe = cls.__new__(cls)
+        recipe._source = source
+        recipe._position = position
+        recipe._title = recipe._ingredients = recipe._instructions = recipe._image_name = None
+        recipe._ingredient_list = None
+        return recipe
+
+    def position_in(self, source):
+        """Returns the recipe's row position in the given Cookbook, or None if it wasn't taken from it"""
+        return self._position if self._source is source else None
+
+    def _field(self, slot, column):
+        """Returns the value in slot, reading it from the source Cookbook the first time"""
+        value = getattr(self, slot)
+        if value is None:
+            value = self._source.recipe_field(column, self._position)
+            setattr(self, slot, value)
+        return value
+
+    @property
+    def title(self):
+        """The title of the recipe"""
+        return self._field('_title', 'Title')
+
+    @property
+    def ingredients(self):
+        """The ingredients, as the string form of a list"""
+        return self._field('_ingredients', 'Ingredients')
+
+    @property
+    def instructions(self):
+        """The instructions, with line breaks replaced by spaces"""
+        return self._field('_instructions', 'Instructions')
+
+    @property
+    def image_name(self):
+        """The name of the image associated with the recipe"""
+        return self._field('_image_name', 'Image_Name')
+
+    @property
+    def ingredient_list(self):
+        """The ingredients as a list, one entry per ingredient"""
+        if self._ingredient_list is None and self._source is None:
+            self._ingredient_list = parse_ingredients(self._ingredients)
+        return self._field('_ingredient_list', 'Ingredient_List')
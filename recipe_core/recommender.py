@@ -0,0 +1,146 @@
+import numpy as np
+from scipy import sparse
+
+from .ingredients import normalize_ingredient
+
+
+STAPLES = ("salt", "black pepper", "pepper", "water", "ice", "olive oil", "vegetable oil")  # assumed to be in every kitchen
+
+
+class Recommender:
+    """
+    Finds recipes by their ingredients, using a sparse recipe by ingredient matrix.
+
+    Every ingredient line is reduced to ingredient names with normalize_ingredient, and each
+    recipe becomes a row of a CSR matrix with a column per distinct name. Both queries are then
+    one sparse matrix-vector product over every recipe followed by a partial sort for the top k,
+    so neither loops over the recipes in Python.
+
+    "Recipes like this" compares ingredient rows by cosine similarity, with each ingredient
+    weighted by how rare it is, so sharing saffron counts for more than sharing salt.
+    "Recipes I can make" counts, for every recipe, how many of its ingredients are on hand.
+    """
+
+    VERSION = 1  # bump this whenever the matrix layout or normalize_ingredient changes, so saved copies are rebuilt
+
+    def __init__(self, ingredient_lists):
+        """
+        Builds the matrices
+
+        Parameters:
+            ingredient_lists (iterable): Each recipe's ingredient lines, in row order
+        """
+        self.columns = {}  # ingredient name -> column
+        indptr = [0]
+        indices = []
+        for ingredients in ingredient_lists:
+            row = {self.columns.setdefault(name, len(self.columns))
+                   for ingredient in ingredients for name in normalize_ingredient(ingredient)}
+            indices.extend(sorted(row))
+            indptr.append(len(indices))
+
+        shape = (len(indptr) - 1, len(self.columns))
+        indices = np.asarray(indices, dtype=np.int32)
+        indptr = np.asarray(indptr, dtype=np.int64)
+        self.names = sorted(self.columns, key=self.columns.get)  # column -> ingredient name
+
+        # 1 where a recipe uses an ingredient
+        self.uses = sparse.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr), shape=shape)
+        self.ingredient_counts = np.diff(indptr).astype(np.int32)  # distinct ingredients per recipe
+
+        # The same rows weighted by inverse document frequency and scaled to unit length, for cosine similarity
+        document_frequency = np.bincount(indices, minlength=shape[1])
+        self.idf = np.log((1 + shape[0]) / (1 + document_frequency)).astype(np.float32) + 1
+        weights = sparse.csr_matrix((self.idf[indices], indices, indptr), shape=shape)
+        norms = np.sqrt(np.asarray(weights.multiply(weights).sum(axis=1)).ravel())
+        norms[norms == 0] = 1  # recipes without ingredients stay all zero
+        self.weights = sparse.csr_matrix(sparse.diags((1 / norms).astype(np.float32)) @ weights)
+
+        # Ingredient word -> columns whose name holds it, so "chicken" finds "chicken thigh" as well
+        self.word_columns = {}
+        for name, column in self.columns.items():
+            for word in set(name.split()):
+                self.word_columns.setdefault(word, set()).add(column)
+
+    def __len__(self):
+        return self.uses.shape[0]
+
+    def ingredient_vector(self, ingredients):
+        """Returns the unit length weighted vector of a list of ingredient lines, as a dense array"""
+        vector = np.zeros(len(self.names), dtype=np.float32)
+        for ingredient in ingredients:
+            for name in normalize_ingredient(ingredient):
+                column = self.columns.get(name)
+                if column is not None:
+                    vector[column] = self.idf[column]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def matching_columns(self, ingredients):
+        """Returns the columns of every ingredient name holding all the words of one of the given ingredients"""
+        columns = set()
+        for ingredient in ingredients:
+            for name in normalize_ingredient(ingredient) or [" ".join(str(ingredient).lower().split())]:
+                postings = [self.word_columns.get(word, set()) for word in name.split()]
+                if postings:
+                    columns |= set.intersection(*postings)
+        return columns
+
+    @staticmethod
+    def top(scores, count, exclude=None):
+        """Returns the positions of the count highest positive scores, best first"""
+        if exclude is not None:
+            scores[exclude] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > count:
+            candidates = candidates[np.argpartition(-scores[candidates], count - 1)[:count]]
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def similar(self, position=None, ingredients=None, count=20):
+        """
+        Returns the row positions of the recipes whose ingredients are most like a recipe's, and their scores
+
+        Parameters:
+            position (int): Row position of the recipe to compare with, left out of the results
+            ingredients (list): Ingredient lines to compare with instead, for a recipe that isn't in the dataset
+            count (int): How many recipes to return at most
+
+        Returns:
+            tuple: (positions, scores), both NumPy arrays best first, scores are cosine similarities from 0 to 1
+        """
+        if position is not None:
+            query = self.weights[position].toarray().ravel()
+        else:
+            query = self.ingredient_vector(ingredients or [])
+        scores = self.weights @ query
+        positions = self.top(scores, count, exclude=position)
+        return positions, scores[positions]
+
+    def can_make(self, ingredients, count=20, staples=STAPLES):
+        """
+        Returns the row positions of the recipes that need the fewest ingredients besides the given ones
+
+        Recipes missing the fewest ingredients come first, and among those the ones using the most
+        of the given ingredients. Only recipes using at least one of them are returned.
+
+        Parameters:
+            ingredients (list): The ingredients on hand, as names ("chicken") or ingredient lines
+            count (int): How many recipes to return at most
+            staples (tuple): Ingredients assumed to be on hand as well, matched by exact name
+
+        Returns:
+            tuple: (positions, missing), both NumPy arrays best first, missing counts the ingredients still needed
+        """
+        wanted = np.zeros(len(self.names), dtype=np.float32)
+        wanted[list(self.matching_columns(ingredients))] = 1
+        on_hand = wanted.copy()
+        on_hand[[self.columns[name] for name in staples if name in self.columns]] = 1
+
+        used = self.uses @ wanted  # how many of the given ingredients each recipe uses
+        have = self.uses @ on_hand
+        missing = self.ingredient_counts - have
+
+        # Fewest missing first, then most of the given ingredients used, folded into one positive score
+        scores = np.where(used > 0, (missing.max(initial=0) + 1 - missing) * (len(self.names) + 1) + used, 0)
+        positions = self.top(scores.astype(np.float64), count)
+        return positions, missing[positions].astype(np.int32)
@@ -0,0 +1,102 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SearchJob:
+    """
+    One query running on a SearchWorker. The results arrive in ranked batches, best matches first.
+
+    ready() never blocks, so a GUI can call it from a timer and show each batch as it arrives.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.batches = queue.Queue()  # lists of results, then None once the search is finished
+        self.cancelled = threading.Event()
+        self.finished = False  # True once ready() has handed back the last batch
+        self.count = 0  # results handed back so far
+
+    def ready(self):
+        """Returns the batches that have arrived since the last call, without waiting for the rest"""
+        batches = []
+        while not self.finished:
+            try:
+                batch = self.batches.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                self.finished = True
+            else:
+                self.count += len(batch)
+                batches.append(batch)
+        return batches
+
+    def done(self):
+        """Returns True once every batch has been handed back, or the job was cancelled"""
+        return self.finished or self.cancelled.is_set()
+
+    def cancel(self):
+        """Stops the search before its next pass or batch. Batches not handed back yet are dropped."""
+        self.cancelled.set()
+
+
+class SearchWorker:
+    """
+    Runs searches on a background thread, so a broad query never blocks the window.
+
+    Only one search runs at a time and starting a new one cancels the one before it. The
+    search function is called on the worker thread and its ranked results are handed back
+    in batches of batch_size.
+
+    A search function can return its results as one list, or yield them in passes, such as
+    the title matches and then the full-text ones. Cancelling is checked before every pass and
+    every batch, so a stale search stops at the next of those. A pass already running is not
+    interrupted, so a search only stops early if it yields its work in passes.
+    """
+
+    def __init__(self, search, batch_size=500):
+        """
+        Parameters:
+            search (function): Called with the query, returns the ranked results as a list or yields them as lists, best first
+            batch_size (int): How many results to hand back at a time
+        """
+        self.search = search
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+        self.current = None  # the most recent job
+        self.lock = threading.Lock()
+
+    def submit(self, query):
+        """Starts searching for query, cancelling the previous search, and returns its SearchJob"""
+        job = SearchJob(query)
+        with self.lock:
+            if self.current is not None:
+                self.current.cancel()
+            self.current = job
+        self.executor.submit(self._run, job)
+        return job
+
+    def cancel(self):
+        """Cancels the running search, if there is one"""
+        with self.lock:
+            if self.current is not None:
+                self.current.cancel()
+
+    def _run(self, job):
+        """Runs one job on the worker thread"""
+        if job.cancelled.is_set():
+            return  # replaced before it started
+        try:
+            results = self.search(job.query)
+            passes = [results] if isinstance(results, list) else results
+            for found in passes:
+                for start in range(0, len(found), self.batch_size):
+                    if job.cancelled.is_set():
+                        return
+                    job.batches.put(found[start:start + self.batch_size])
+                if job.cancelled.is_set():
+                    return  # replaced, so the next pass is never worked out
+        except Exception as e:  # the GUI just sees the results found so far
+            print("Error searching:", e)
+        job.batches.put(None)
@@ -0,0 +1,175 @@
+import collections
+import hashlib
+import re
+
+import numpy as np
+
+
+_TERM_RE = re.compile(r"[^\W_]+(?:-[^\W_]+)*")  # words, keeping hyphenated ones such as "no-bake" together
+
+
+def terms(text):
+    """
+    Returns the search terms of text, lowercased
+
+    A hyphenated word gives the whole word and each of its parts, so "no-bake" is found by
+    "no-bake" and by "bake". Plain numbers are left out, they only ever count amounts.
+    """
+    found = []
+    for word in _TERM_RE.findall(str(text).lower()):
+        if "-" in word:
+            found.append(word)
+            found.extend(part for part in word.split("-") if not part.isdigit())
+        elif not word.isdigit():
+            found.append(word)
+    return found
+
+
+class TextIndex:
+    """
+    A BM25 full-text index over the title, ingredients and instructions of every recipe.
+
+    The postings are kept in flat NumPy arrays sorted by term: offsets[term] to offsets[term + 1]
+    is the slice of doc_ids and weights for one term, so a query only adds up one slice per
+    word and never reads the recipe text. Each posting's weight is its precomputed BM25 score.
+    Words in the title count three times and words in the ingredients twice, so a recipe
+    named after a word ranks above one that only mentions it in passing.
+
+    A hash of every recipe's text is kept too. When the CSV changes, update() only reads
+    the recipes whose text changed and reuses the postings of the rest.
+    """
+
+    VERSION = 1  # bump this whenever the index layout or terms() changes, so saved copies are rebuilt
+    FIELDS = (('Title', 3), ('Ingredients', 2), ('Instructions', 1))  # column, how many times its words count
+    K1 = 1.2  # how quickly repeating a word stops raising the score
+    B = 0.75  # how much long recipes are marked down
+
+    def __init__(self, dataframe):
+        """
+        Builds the index
+
+        Parameters:
+            dataframe (DataFrame): The recipes, with the columns named in FIELDS
+        """
+        self.vocabulary = {}  # term -> term id
+        rows = self._rows(dataframe)
+        self.doc_hashes = np.array([self._hash(row) for row in rows], dtype=np.uint64)
+        self.doc_lengths = np.zeros(len(rows), dtype=np.float32)
+        self._build(*self._analyze(rows, range(len(rows))))
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def _rows(self, dataframe):
+        """Returns the text fields of every recipe, as tuples in FIELDS order"""
+        columns = [dataframe[column].tolist() for column, _ in self.FIELDS]
+        return [tuple(value if isinstance(value, str) else "" for value in row) for row in zip(*columns)]
+
+    @staticmethod
+    def _hash(row):
+        """Returns a 64 bit hash of one recipe's text fields"""
+        return int.from_bytes(hashlib.blake2b("\x1f".join(row).encode('utf-8'), digest_size=8).digest(), 'little')
+
+    def _analyze(self, rows, doc_ids):
+        """
+        Counts the terms of the given rows, stored under the given doc ids, and records their lengths.
+        Returns the (term id, doc id, frequency) arrays of their postings.
+        """
+        term_ids, posting_docs, frequencies = [], [], []
+        for row, doc_id in zip(rows, doc_ids):
+            counts = collections.Counter()
+            for (column, weight), text in zip(self.FIELDS, row):
+                for term in terms(text):
+                    counts[term] += weight
+            self.doc_lengths[doc_id] = sum(counts.values())
+            for term, frequency in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                posting_docs.append(doc_id)
+                frequencies.append(frequency)
+        return (np.array(term_ids, dtype=np.int32), np.array(posting_docs, dtype=np.int32),
+                np.array(frequencies, dtype=np.float32))
+
+    def _build(self, term_ids, doc_ids, frequencies):
+        """Sorts the postings by term and doc and works out their BM25 weights"""
+        order = np.lexsort((doc_ids, term_ids))
+        self.doc_ids = doc_ids[order]
+        self.frequencies = frequencies[order]  # kept so update() can reweigh the postings it reuses
+        counts = np.bincount(term_ids, minlength=len(self.vocabulary))
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+        # BM25, with the idf of each term repeated over its postings
+        documents = max(len(self.doc_lengths), 1)
+        idf = np.log(1 + (documents - counts + 0.5) / (counts + 0.5)).astype(np.float32)
+        average_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 1.0
+        lengths = self.doc_lengths[self.doc_ids] / max(average_length, 1.0)
+        self.weights = (np.repeat(idf, counts) * self.frequencies * (self.K1 + 1)
+                        / (self.frequencies + self.K1 * (1 - self.B + self.B * lengths))).astype(np.float32)
+
+    def update(self, dataframe):
+        """
+        Brings the index up to date with a changed dataset and returns it
+
+        Recipes whose text is unchanged keep their postings, wherever they moved to.
+        Only new and edited recipes are read again.
+        """
+        rows = self._rows(dataframe)
+        hashes = np.array([self._hash(row) for row in rows], dtype=np.uint64)
+        old_position = dict(zip(self.doc_hashes.tolist(), range(len(self.doc_hashes))))
+        reused = np.array([old_position.get(value, -1) for value in hashes.tolist()], dtype=np.int64)
+        kept = np.flatnonzero(reused >= 0)  # new doc ids whose text was indexed before
+
+        # The old postings in doc order, so each kept recipe's postings are one slice
+        posting_terms = np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int32), np.diff(self.offsets))
+        by_doc = np.argsort(self.doc_ids, kind='stable')
+        doc_counts = np.bincount(self.doc_ids, minlength=len(self.doc_hashes))
+        doc_starts = np.concatenate(([0], np.cumsum(doc_counts)))[:-1]
+
+        sources = reused[kept]
+        lengths = doc_counts[sources]
+        total = int(lengths.sum())
+        slice_starts = np.repeat(doc_starts[sources] - np.concatenate(([0], np.cumsum(lengths)))[:-1], lengths)
+        picked = by_doc[slice_starts + np.arange(total)]
+
+        doc_lengths = np.zeros(len(rows), dtype=np.float32)
+        doc_lengths[kept] = self.doc_lengths[sources]
+        self.doc_lengths = doc_lengths
+        self.doc_hashes = hashes
+
+        changed = np.flatnonzero(reused < 0)
+        new_terms, new_docs, new_frequencies = self._analyze([rows[i] for i in changed], changed)
+        self._build(np.concatenate((posting_terms[picked], new_terms)),
+                    np.concatenate((np.repeat(kept, lengths).astype(np.int32), new_docs)),
+                    np.concatenate((self.frequencies[picked], new_frequencies)))
+        return self
+
+    def search(self, query, limit=None):
+        """
+        Returns the row positions of the recipes containing every word of query, best matches first
+
+        Parameters:
+            query (str): The words to search for, case is ignored
+            limit (int): The maximum number of positions to return, or None for all
+        """
+        query_terms = list(dict.fromkeys(terms(query)))
+        required = [term for term in query_terms if "-" not in term]  # hyphenated words only raise the score
+        if not required:
+            return []
+
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        matched = np.zeros(len(self.doc_lengths), dtype=np.int32)
+        for term in query_terms:
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                if term in required:
+                    return []  # a word no recipe has
+                continue
+            postings = slice(self.offsets[term_id], self.offsets[term_id + 1])
+            doc_ids = self.doc_ids[postings]  # a term lists each doc once, so plain fancy indexing adds correctly
+            scores[doc_ids] += self.weights[postings]
+            if term in required:
+                matched[doc_ids] += 1
+
+        candidates = np.flatnonzero(matched == len(required))
+        if limit is not None and len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        return candidates[np.argsort(-scores[candidates], kind='stable')].tolist()
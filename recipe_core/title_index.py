@@ -0,0 +1,316 @@
+import bisect
+import re
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"\w+")
+FUZZY_CANDIDATES = 50  # titles sharing the most trigrams with a fuzzy query that are checked by edit distance
+
+
+def normalize(text):
+    """Lowercases text and collapses whitespace, the form every index lookup is done in"""
+    return " ".join(str(text).lower().split())
+
+
+def trigrams(text):
+    """Returns the set of three character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def short_grams(text):
+    """Returns the set of one and two character substrings of text, leaving out those with a space"""
+    grams = set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+    return {gram for gram in grams if " " not in gram}
+
+
+def edit_distance(a, b, bound):
+    """
+    Returns the Levenshtein distance between a and b, or bound + 1 as soon as it is sure to be more than bound
+
+    Only the diagonal band of cells within bound of each other is filled in, so telling that two
+    long strings are far apart costs about bound times their length instead of their product.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    if len(a) > len(b):
+        a, b = b, a
+    too_far = bound + 1
+    previous = [j if j <= bound else too_far for j in range(len(b) + 1)]
+    for i, a_char in enumerate(a, 1):
+        current = [i if i <= bound else too_far] + [too_far] * len(b)
+        low, high = max(1, i - bound), min(len(b), i + bound)
+        for j in range(low, high + 1):
+            current[j] = min(previous[j - 1] + (a_char != b[j - 1]), previous[j] + 1, current[j - 1] + 1)
+        if min(current[low - 1:high + 1]) > bound:  # every cell outside the band is already too far
+            return too_far
+        previous = current
+    return min(previous[-1], too_far)
+
+
+def _csr(keys, positions, key_count):
+    """
+    Groups (key, position) pairs by key into two arrays: positions[offsets[key]:offsets[key + 1]]
+    are the positions of one key. The pairs must come in ascending position order, which each key keeps.
+    """
+    keys = np.asarray(keys, dtype=np.int32)
+    positions = np.asarray(positions, dtype=np.int32)
+    offsets = np.zeros(key_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=key_count), out=offsets[1:])
+    return offsets, positions[np.argsort(keys, kind='stable')]
+
+
+def _intersect(small, large):
+    """Returns the values of the sorted array small that are also in the sorted array large"""
+    if not len(large):
+        return large
+    if len(small) * 16 > large[-1]:  # dense arrays, a lookup table is cheaper than a binary search per value
+        table = np.zeros(large[-1] + 1, dtype=bool)
+        table[large] = True
+        small = small[:np.searchsorted(small, large[-1], side='right')]
+        return small[table[small]]
+    found = np.minimum(np.searchsorted(large, small), len(large) - 1)
+    return small[large[found] == small]
+
+
+class TitleIndex:
+    """
+    An inverted index over recipe titles for fast, ranked substring search.
+
+    Every lowercased title is broken into its one, two and three character substrings,
+    and each of those grams maps to the sorted row positions whose title contains it.
+    A query word of up to three characters is a gram itself, so its matches are read
+    straight from the index. A longer word can only match titles that hold all of its
+    trigrams, so only that small candidate set is checked with a plain substring test.
+
+    The postings of every gram are kept back to back in one int32 array with an offsets
+    table, and the whole words of the titles likewise in the order of the sorted vocabulary,
+    so the titles with a word starting with some text are one contiguous slice. The index
+    pickles and loads as a few large arrays and ranking is done on arrays too.
+
+    Multi-word queries match titles that contain every word, in any order. Results
+    are ranked so that titles containing the whole query come first, then titles where
+    every word is a whole word, then titles where every word starts a word, and
+    shorter titles before longer ones inside each of those groups.
+    """
+
+    VERSION = 5  # bump this whenever the index layout changes, so saved copies are rebuilt
+
+    def __init__(self, titles):
+        """
+        Builds the index
+
+        Parameters:
+            titles (iterable): The recipe titles, in row order. Missing titles are indexed as empty.
+        """
+        self.titles = [title if isinstance(title, str) else "" for title in titles]  # NaN for missing titles
+        self.normalized = [normalize(title) for title in self.titles]
+        self.grams = {}  # gram -> gram id, its slice of gram_positions
+        token_ids = {}   # whole word -> token id while building, renumbered in vocabulary order below
+
+        gram_ids, gram_positions, title_tokens, token_positions = [], [], [], []
+        for position, title in enumerate(self.normalized):
+            for gram in short_grams(title) | trigrams(title):
+                gram_ids.append(self.grams.setdefault(gram, len(self.grams)))
+                gram_positions.append(position)
+            for token in set(_TOKEN_RE.findall(title)):
+                title_tokens.append(token_ids.setdefault(token, len(token_ids)))
+                token_positions.append(position)
+        self.gram_offsets, self.gram_positions = _csr(gram_ids, gram_positions, len(self.grams))
+
+        self.vocabulary = sorted(token_ids)  # sorted so the words starting with some text are one slice
+        renumber = np.empty(len(token_ids), dtype=np.int32)
+        renumber[[token_ids[token] for token in self.vocabulary]] = np.arange(len(token_ids), dtype=np.int32)
+        self.token_offsets, self.token_positions = _csr(renumber[np.asarray(title_tokens, dtype=np.int64)],
+                                                        token_positions, len(token_ids))
+
+        # Shorter titles are the closer match, ties keep dataset order
+        lengths = np.fromiter(map(len, self.normalized), dtype=np.int64, count=len(self.normalized))
+        self.static_rank = np.empty(len(lengths), dtype=np.int32)
+        self.static_rank[np.argsort(lengths, kind='stable')] = np.arange(len(lengths), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _gram_postings(self, gram):
+        """Returns the sorted positions of the titles containing a gram, or None if no title does"""
+        gram_id = self.grams.get(gram)
+        if gram_id is None:
+            return None
+        return self.gram_positions[self.gram_offsets[gram_id]:self.gram_offsets[gram_id + 1]]
+
+    def _containing(self, text):
+        """
+        Returns the sorted array of positions whose title contains text
+
+        Up to three characters the text is a gram and its postings are the answer. A longer text
+        is looked for in the titles holding all of its trigrams, or, when even its rarest trigram
+        is in more titles than there are words, in the vocabulary, since a run of word characters
+        can only sit inside one word.
+        """
+        grams = {text} if len(text) <= 3 else trigrams(text)
+
+        postings = []
+        for gram in grams:
+            posting = self._gram_postings(gram)
+            if posting is None:
+                return self.gram_positions[:0]  # a gram no title has, so nothing can match
+            postings.append(posting)
+        if len(text) <= 3:
+            return postings[0]
+
+        postings.sort(key=len)  # intersect from the smallest posting up
+        if len(postings[0]) > len(self.vocabulary) and _TOKEN_RE.fullmatch(text):
+            return self._in_words(text)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            candidates = _intersect(candidates, posting)
+            if not len(candidates):
+                return candidates
+
+        # Titles can share all of a text's trigrams without containing it, so check the candidates
+        normalized = self.normalized
+        keep = np.fromiter((text in normalized[position] for position in candidates.tolist()),
+                           dtype=bool, count=len(candidates))
+        return candidates[keep]
+
+    def _in_words(self, text):
+        """Returns the sorted positions of the titles with a word containing text"""
+        offsets = self.token_offsets
+        postings = [self.token_positions[offsets[token]:offsets[token + 1]]
+                    for token, word in enumerate(self.vocabulary) if text in word]
+        if len(postings) <= 1:
+            return postings[0] if postings else self.token_positions[:0]
+        positions = np.sort(np.concatenate(postings))
+        return positions[np.concatenate(([True], positions[1:] != positions[:-1]))]  # a title can have two such words
+
+    def _word_positions(self, word, prefix):
+        """Returns the positions of the titles with word as a whole word, or only starting a word if prefix is True"""
+        low = bisect.bisect_left(self.vocabulary, word)
+        if prefix:
+            high = bisect.bisect_left(self.vocabulary, word[:-1] + chr(ord(word[-1]) + 1))
+        else:
+            high = low + (low < len(self.vocabulary) and self.vocabulary[low] == word)
+        return self.token_positions[self.token_offsets[low]:self.token_offsets[high]]
+
+    def _mask(self, positions):
+        """Returns a boolean array over every title, True at the given positions"""
+        mask = np.zeros(len(self.titles), dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def _rank(self, matches, query, words, limit=None):
+        """
+        Returns the matching positions, best first, only the best limit of them if limit is given
+
+        A one or two letter query can match most titles, so the ranking is done on arrays and a
+        limit only partially sorts the matches instead of ordering all of them.
+        """
+        if limit is not None and limit <= 0:
+            return []
+        whole_words = np.ones(len(self.titles), dtype=bool)
+        word_starts = np.ones(len(self.titles), dtype=bool)
+        for word in set(words):
+            whole_words &= self._mask(self._word_positions(word, prefix=False))
+            word_starts &= self._mask(self._word_positions(word, prefix=True))
+        groups = 2 * ~whole_words[matches] + ~word_starts[matches]
+        if len(words) > 1:  # a single word query is always contained as typed
+            groups = groups + 4 * ~self._mask(self._containing(query))[matches]
+
+        # Fold the three groups and the static rank into one integer, so a single argsort orders them
+        keys = groups.astype(np.int64) * len(self.titles) + self.static_rank[matches]
+        if limit is not None and limit < len(keys):
+            best = np.argpartition(keys, limit - 1)[:limit]
+            order = best[np.argsort(keys[best])]
+        else:
+            order = np.argsort(keys)
+        return matches[order].tolist()
+
+    def search(self, query, limit=None):
+        """
+        Returns the row positions of titles containing every word of query, best matches first
+
+        Parameters:
+            query (str): The text to search for, case is ignored
+            limit (int): The maximum number of positions to return, or None for all
+        """
+        query = normalize(query)
+        if not query:
+            return list(range(len(self.titles)))[:limit]  # an empty search matches everything, like str.contains("")
+
+        words = query.split()
+        matches = None
+        for word in sorted(set(words), key=len, reverse=True):  # long words tend to match the fewest titles
+            positions = self._containing(word)
+            if matches is None:
+                matches = positions
+            else:
+                smaller, larger = sorted((matches, positions), key=len)
+                matches = _intersect(smaller, larger)
+            if not len(matches):
+                return []
+        return self._rank(matches, query, words, limit)
+
+    def search_titles(self, query, limit=None):
+        """Returns the titles containing every word of query, best matches first"""
+        return [self.titles[position] for position in self.search(query, limit)]
+
+    def _fuzzy_distance(self, query, word_count, title, bound):
+        """
+        Returns how far title is from query as (closest, whole): the fewest edits that turn query
+        into the whole title or into any run of word_count of its words, and the edits to the whole title.
+        Either is bound + 1 if it is more than bound.
+        """
+        whole = edit_distance(query, title, bound)
+        closest = whole
+        words = title.split()
+        for start in range(len(words) - word_count + 1):
+            if closest == 0:
+                break
+            window = " ".join(words[start:start + word_count])
+            if abs(len(window) - len(query)) < closest:
+                closest = min(closest, edit_distance(query, window, closest - 1))
+        return closest, whole
+
+    def fuzzy(self, query, limit=10, max_distance=None):
+        """
+        Returns the row positions of the titles closest to query, allowing for typos, closest first
+
+        Titles sharing the most trigrams with query are the candidates, and those are ranked by how
+        many edits turn query into the title, or into the part of the title it lines up with best.
+        Titles whose whole text is close come before titles that only contain a close match, then
+        shorter titles first.
+
+        Parameters:
+            query (str): The title as typed, case is ignored
+            limit (int): The maximum number of positions to return
+            max_distance (int): The most edits allowed, about one per four characters of query if None
+        """
+        query = normalize(query)
+        grams = [posting for posting in map(self._gram_postings, trigrams(query)) if posting is not None]
+        if not grams:
+            return []
+        if max_distance is None:
+            max_distance = min(3, max(1, len(query) // 4))
+
+        # One edit changes at most three of the query's trigrams
+        shared = np.bincount(np.concatenate(grams), minlength=len(self.titles))
+        candidates = np.flatnonzero(shared >= max(1, len(trigrams(query)) - 3 * max_distance))
+        if len(candidates) > FUZZY_CANDIDATES:
+            candidates = candidates[np.argpartition(-shared[candidates], FUZZY_CANDIDATES - 1)[:FUZZY_CANDIDATES]]
+        candidates = candidates[np.argsort(-shared[candidates], kind='stable')]  # likely matches first
+
+        word_count = len(query.split())
+        ranked = []
+        bound = max_distance
+        for position in candidates.tolist():
+            closest, whole = self._fuzzy_distance(query, word_count, self.normalized[position], bound)
+            if closest <= bound:
+                ranked.append((closest, whole != closest, self.static_rank[position], position))
+                if len(ranked) >= limit:
+                    # Once limit titles are this close, a title further away can't make the results
+                    ranked.sort()
+                    del ranked[limit:]
+                    bound = ranked[-1][0]
+        ranked.sort()
+        return [position for _, _, _, position in ranked[:limit]]
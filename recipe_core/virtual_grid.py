@@ -0,0 +1,86 @@
+class VirtualGrid:
+    """
+    Keeps tiles only for the cells of a grid that are in or near the visible part of a scrolled view.
+
+    The grid itself knows nothing about any GUI toolkit. It works out which cells are on
+    screen from the scroll position and hands tiles to the three callbacks it is given:
+    create_tile makes a new empty tile, bind_tile shows a tile at a cell and fills it in
+    for that cell's item, and hide_tile takes a tile off screen. Tiles that scroll out of
+    view are kept and bound to the cells scrolling in, so the number of tiles, and of
+    decoded images, depends on the size of the window rather than the number of items.
+    """
+
+    def __init__(self, columns, cell_size, create_tile, bind_tile, hide_tile, overscan=1):
+        """
+        Parameters:
+            columns (int): How many tiles fit side by side
+            cell_size (tuple): The (width, height) of one cell, in pixels
+            create_tile (function): Called with no arguments to make a new tile
+            bind_tile (function): Called with (tile, index) to show a tile for the item at index
+            hide_tile (function): Called with a tile that is no longer needed on screen
+            overscan (int): Rows above and below the visible ones to keep tiles for, so short scrolls show finished tiles
+        """
+        self.columns = columns
+        self.cell_width, self.cell_height = cell_size
+        self.create_tile = create_tile
+        self.bind_tile = bind_tile
+        self.hide_tile = hide_tile
+        self.overscan = overscan
+
+        self.count = 0  # number of items in the grid
+        self.tiles = {}  # item index -> tile, for every cell that currently has one
+        self.spare = []  # hidden tiles waiting to be bound again
+
+    def rows(self):
+        """Returns the number of rows the items take"""
+        return -(-self.count // self.columns)
+
+    def content_height(self):
+        """Returns the height of the whole grid, for the scroll region"""
+        return self.rows() * self.cell_height
+
+    def cell_origin(self, index):
+        """Returns the (x, y) of the top left corner of the cell of the item at index"""
+        row, column = divmod(index, self.columns)
+        return column * self.cell_width, row * self.cell_height
+
+    def visible_range(self, top, height):
+        """Returns the range of item indices whose rows are within overscan rows of the view"""
+        first_row = max(int(top // self.cell_height) - self.overscan, 0)
+        last_row = int((top + height) // self.cell_height) + self.overscan
+        return range(min(first_row * self.columns, self.count), min((last_row + 1) * self.columns, self.count))
+
+    def update(self, top, height):
+        """
+        Moves tiles to the cells in view, recycling the ones that left it
+
+        Parameters:
+            top (float): The y of the top of the view, measured from the top of the grid
+            height (float): The height of the view
+
+        Returns:
+            list: The item indices that were given a tile by this call, top left first
+        """
+        visible = self.visible_range(top, height)
+
+        for index in [index for index in self.tiles if index not in visible]:
+            tile = self.tiles.pop(index)
+            self.hide_tile(tile)
+            self.spare.append(tile)
+
+        shown = []
+        for index in visible:
+            if index not in self.tiles:
+                tile = self.spare.pop() if self.spare else self.create_tile()
+                self.tiles[index] = tile
+                self.bind_tile(tile, index)
+                shown.append(index)
+        return shown
+
+    def reset(self, count):
+        """Hides every tile and starts over with count items, e.g. after the item list changed"""
+        for tile in self.tiles.values():
+            self.hide_tile(tile)
+            self.spare.append(tile)
+        self.tiles = {}
+        self.count = count
@@ -0,0 +1,59 @@
+import pandas as pd
+
+from recipe_core.cookbook import Cookbook
+
+
+def make_cookbook(tmp_path, image_dir):
+    """Builds a Cookbook over a three recipe CSV in tmp_path"""
+    csv_path = tmp_path / "recipes.csv"
+    pd.DataFrame({
+        'Title': ["Basil Pasta", "Lemon Cake", "Chicken Soup"],
+        'Ingredients': ["['1 cup basil']", "['2 lemons']", "['1 chicken']"],
+        'Instructions': ["Cook.", "Bake.", "Simmer."],
+        'Image_Name': ["basil-pasta", "lemon-cake", "chicken-soup"],
+    }).to_csv(csv_path)
+    return Cookbook(csv_loc=str(csv_path), image_dir=str(image_dir))
+
+
+def test_random_recipe_without_any_images(tmp_path):
+    cookbook = make_cookbook(tmp_path, tmp_path / "missing")
+    assert len(cookbook.image_positions) == 0
+
+    recipe = cookbook.get_random_recipe()
+    assert recipe.title in ("Basil Pasta", "Lemon Cake", "Chicken Soup")
+    assert len(cookbook.get_random_recipes(5, seed=1)) == 5
+    assert sorted(recipe.title for recipe in cookbook.get_random_recipes(5, replace=False)) == \
+        ["Basil Pasta", "Chicken Soup", "Lemon Cake"]
+
+
+def test_random_recipes_only_draw_recipes_with_images(tmp_path):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    from PIL import Image
+    Image.new('RGB', (4, 4)).save(image_dir / "lemon-cake.jpg")
+
+    cookbook = make_cookbook(tmp_path, image_dir)
+    assert {recipe.title for recipe in cookbook.get_random_recipes(10, seed=2)} == {"Lemon Cake"}
+    assert len(cookbook.get_random_recipes(10, seed=2, with_images=False)) == 10
+
+
+def test_title_completer_loaded_from_cache_completes_from_the_title_index(tmp_path):
+    first = make_cookbook(tmp_path, tmp_path / "missing")
+    assert first.suggest_titles("ch", 1) == ["Chicken Soup"]
+
+    second = make_cookbook(tmp_path, tmp_path / "missing")
+    completer = second.title_completer
+    assert completer.normalized is second.title_index.normalized
+    assert second.suggest_titles("ch", 1) == ["Chicken Soup"]
+    assert completer.__getstate__()['normalized'] is None  # the titles are only saved with the title index
+
+
+def test_recommendations_come_with_how_close_they_are(tmp_path):
+    cookbook = make_cookbook(tmp_path, tmp_path / "missing")
+
+    recipe, missing = cookbook.recipes_with_ingredients(["lemons"], count=1)[0]
+    assert (recipe.title, missing) == ("Lemon Cake", 0)
+
+    basil_pasta = cookbook.fetch_specific_recipe("Basil Pasta")
+    for recipe, score in cookbook.similar_recipes(basil_pasta):
+        assert recipe.title != "Basil Pasta" and 0 <= score <= 1
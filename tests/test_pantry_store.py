@@ -0,0 +1,70 @@
+import json
+import os
+
+from recipe_core.pantry_store import PantryStore
+
+
+def recipe(title):
+    return {'title': title, 'ingredients': "['1 " + title.lower() + "']", 'instructions': "Cook.", 'image_name': ""}
+
+
+def make_store(tmp_path, entries=None, compact_every=500):
+    """Returns a PantryStore over Sample.json in tmp_path, writing entries to its snapshot first if given"""
+    filepath = tmp_path / "Sample.json"
+    if entries is not None:
+        filepath.write_text(json.dumps(entries))
+    return PantryStore(filepath=str(filepath), compact_every=compact_every)
+
+
+def test_journal_is_replayed_over_the_snapshot(tmp_path):
+    store = make_store(tmp_path, {"Basil Pasta": recipe("Basil Pasta"), "Lemon Cake": recipe("Lemon Cake")})
+    store.save(recipe("Chicken Soup"))
+    store.remove("Basil Pasta")
+    store.save(dict(recipe("Lemon Cake"), instructions="Bake."))
+
+    entries = make_store(tmp_path).load()
+    assert sorted(entries) == ["Chicken Soup", "Lemon Cake"]
+    assert entries["Lemon Cake"]['instructions'] == "Bake."
+    assert json.loads((tmp_path / "Sample.json").read_text()) == \
+        {"Basil Pasta": recipe("Basil Pasta"), "Lemon Cake": recipe("Lemon Cake")}  # only compaction rewrites it
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    store = make_store(tmp_path)
+    store.save(recipe("Basil Pasta"))
+    with open(store.journal_path, 'a') as f:
+        f.write('{"op": "save", "recipe": {"title": "Lem')  # a crash part way through an append
+
+    store = make_store(tmp_path)
+    assert list(store.load()) == ["Basil Pasta"]
+    store.save(recipe("Chicken Soup"))  # goes on a line of its own instead of being swallowed by the torn one
+
+    assert sorted(make_store(tmp_path).load()) == ["Basil Pasta", "Chicken Soup"]
+
+
+def test_compaction_loses_no_entries(tmp_path):
+    store = make_store(tmp_path, {"Basil Pasta": recipe("Basil Pasta")})
+    store.save(recipe("Lemon Cake"))
+    store.remove("Basil Pasta")
+
+    # An interrupted compaction left its rotated journal behind, and more changes were journaled after it
+    os.replace(store.journal_path, store.rotated_path)
+    store.save(recipe("Chicken Soup"))
+    store.compact()
+
+    assert not os.path.exists(store.journal_path) and not os.path.exists(store.rotated_path)
+    expected = {"Lemon Cake": recipe("Lemon Cake"), "Chicken Soup": recipe("Chicken Soup")}
+    assert json.loads((tmp_path / "Sample.json").read_text()) == expected
+    assert make_store(tmp_path).load() == expected
+
+
+def test_compacts_in_background_once_the_journal_is_long(tmp_path):
+    store = make_store(tmp_path, compact_every=3)
+    for title in ["Basil Pasta", "Lemon Cake", "Chicken Soup"]:
+        store.save(recipe(title))
+    store.compactor.join()
+
+    assert store.journal_length == 0
+    assert sorted(json.loads((tmp_path / "Sample.json").read_text())) == ["Basil Pasta", "Chicken Soup", "Lemon Cake"]
+    store.save(recipe("Pasta Rice"))
+    assert len(make_store(tmp_path).load()) == 4
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from recipe_core.text_index import TextIndex
+
+
+def recipes(rows):
+    return pd.DataFrame(rows, columns=['Title', 'Ingredients', 'Instructions'])
+
+
+BEFORE = [
+    ("Basil Pasta", "['1 cup basil', '200 g pasta']", "Boil the pasta. Stir in the basil."),
+    ("Lemon Cake", "['2 lemons', '1 cup flour', '1 cup sugar']", "Bake for an hour."),
+    ("Chicken Soup", "['1 chicken', '2 carrots']", "Simmer the chicken with the carrots."),
+    ("Lemon Chicken", "['1 chicken', '1 lemon']", "Roast the chicken with the lemon."),
+    ("Carrot Cake", "['3 carrots', '1 cup flour']", "Bake the carrots into the cake."),
+]
+AFTER = [
+    BEFORE[3],
+    ("Chicken Soup", "['1 chicken', '2 carrots', '1 cup pasta']", "Simmer the chicken, carrots and pasta."),  # changed
+    BEFORE[0],
+    ("Basil Chicken", "['1 chicken', '1 cup basil']", "Fry the chicken with the basil."),  # added
+    BEFORE[4],
+    # Lemon Cake removed
+]
+
+
+def postings(index):
+    """Returns (term, doc id) -> BM25 weight for every posting of an index"""
+    terms = {term_id: term for term, term_id in index.vocabulary.items()}
+    term_ids = np.repeat(np.arange(len(index.offsets) - 1), np.diff(index.offsets))
+    return {(terms[term_id], doc_id): weight
+            for term_id, doc_id, weight in zip(term_ids.tolist(), index.doc_ids.tolist(), index.weights.tolist())}
+
+
+QUERIES = ["chicken", "basil", "lemon", "cake", "carrots", "pasta", "flour", "chicken basil", "bake cake", "sugar"]
+
+
+def test_update_matches_a_fresh_index():
+    updated = TextIndex(recipes(BEFORE)).update(recipes(AFTER))
+    fresh = TextIndex(recipes(AFTER))
+
+    assert len(updated) == len(fresh)
+    assert np.array_equal(updated.doc_lengths, fresh.doc_lengths)
+    updated_postings, fresh_postings = postings(updated), postings(fresh)
+    assert updated_postings.keys() == fresh_postings.keys()
+    for key, weight in fresh_postings.items():
+        assert abs(updated_postings[key] - weight) < 1e-5, key
+    for query in QUERIES:
+        assert updated.search(query) == fresh.search(query), query
+        assert updated.search(query, limit=2) == fresh.search(query, limit=2), query
+    assert updated.search("sugar") == []  # only the removed recipe had it